@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+import numpy as np
+from langchain.docstore.document import Document
+import config
+import metrics
+
+
+# Semantic answer cache: a new question reuses a stored answer when its query
+# embedding is close enough to one already answered in the same language,
+# index version and temperature.
+
+_lock = threading.RLock()
+_entries = None
+_stats = {"hits": 0, "misses": 0}
+
+
+def _db_path():
+    return os.path.join(config.SEARCH_CACHE_DIR, "answer_cache.sqlite3") if config.SEARCH_CACHE_DIR else None
+
+
+def _connect():
+    path = _db_path()
+    if path is None:
+        return None
+    os.makedirs(config.SEARCH_CACHE_DIR, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=5)
+    conn.execute("""CREATE TABLE IF NOT EXISTS answers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        lang TEXT, index_version INTEGER, temperature REAL,
+        question TEXT, embedding TEXT, answer TEXT, sources TEXT, created_at REAL
+    )""")
+    return conn
+
+
+def _to_entry(row):
+    entry_id, lang, version, temp, question, embedding, answer, sources, created_at = row
+    vector = np.asarray(json.loads(embedding), dtype=np.float32)
+    payloads = json.loads(sources)
+    return {
+        "id": entry_id, "lang": lang, "index_version": version, "temperature": temp,
+        "question": question, "vector": vector / (np.linalg.norm(vector) or 1.0),
+        "answer": answer, "sources": payloads, "created_at": created_at,
+        "source_names": {p.get("source") for p in payloads},
+    }
+
+
+def _load():
+    global _entries
+    if _entries is None:
+        _entries = []
+        try:
+            conn = _connect()
+            if conn is not None:
+                with conn:
+                    rows = conn.execute(
+                        "SELECT * FROM answers ORDER BY created_at DESC LIMIT ?",
+                        (config.ANSWER_CACHE_MAX_ENTRIES,)
+                    ).fetchall()
+                _entries = [_to_entry(row) for row in rows]
+        except Exception as e:
+            print(f"[⚠️ ANSWER CACHE LOAD ERROR] {e}")
+    return _entries
+
+
+def _threshold(lang):
+    return config.ANSWER_CACHE_THRESHOLD_AR if lang == "ar" else config.ANSWER_CACHE_THRESHOLD
+
+
+def lookup(query_embedding, lang, index_version, temp):
+    """Return {"result", "source_documents", "question", "similarity"} for the closest match above the threshold."""
+    if not config.ANSWER_CACHE_ENABLED or _threshold(lang) > 1:
+        return None
+
+    with _lock:
+        candidates = [
+            e for e in _load()
+            if e["lang"] == lang and e["index_version"] == index_version and e["temperature"] == temp
+        ]
+        if not candidates:
+            _stats["misses"] += 1
+            metrics.inc("cache_requests_total", cache="answer", result="miss")
+            return None
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        similarities = np.stack([e["vector"] for e in candidates]) @ query
+        best = int(np.argmax(similarities))
+        if similarities[best] < _threshold(lang):
+            _stats["misses"] += 1
+            metrics.inc("cache_requests_total", cache="answer", result="miss")
+            return None
+
+        _stats["hits"] += 1
+        metrics.inc("cache_requests_total", cache="answer", result="hit")
+        entry = candidates[best]
+
+    print(f"[ANSWER CACHE HIT] {similarities[best]:.3f} ~ {entry['question'][:80]}")
+    return {
+        "result": entry["answer"],
+        "source_documents": [Document(page_content=p["text"], metadata=p) for p in entry["sources"]],
+        "question": entry["question"],
+        "similarity": float(similarities[best]),
+    }
+
+
+def store(question, query_embedding, lang, index_version, temp, response):
+    if not config.ANSWER_CACHE_ENABLED or _threshold(lang) > 1:
+        return
+
+    payloads = [dict(doc.metadata, text=doc.page_content) for doc in response["source_documents"]]
+    row = [
+        None, lang, index_version, temp, question,
+        json.dumps(list(map(float, query_embedding))), response["result"],
+        json.dumps(payloads, ensure_ascii=False), time.time(),
+    ]
+
+    with _lock:
+        try:
+            conn = _connect()
+            if conn is not None:
+                with conn:
+                    row[0] = conn.execute(
+                        "INSERT INTO answers (lang, index_version, temperature, question, embedding, answer, sources, created_at)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        row[1:]
+                    ).lastrowid
+                    conn.execute(
+                        "DELETE FROM answers WHERE id NOT IN (SELECT id FROM answers ORDER BY created_at DESC LIMIT ?)",
+                        (config.ANSWER_CACHE_MAX_ENTRIES,)
+                    )
+        except Exception as e:
+            print(f"[⚠️ ANSWER CACHE STORE ERROR] {e}")
+
+        entries = _load()
+        entries.insert(0, _to_entry(row))
+        del entries[config.ANSWER_CACHE_MAX_ENTRIES:]
+
+
+def invalidate_sources(source_names):
+    """Drop every cached answer that cited one of the given source files."""
+    source_names = set(source_names)
+    with _lock:
+        entries = _load()
+        stale = [e for e in entries if e["source_names"] & source_names]
+        if not stale:
+            return 0
+        entries[:] = [e for e in entries if not (e["source_names"] & source_names)]
+        try:
+            conn = _connect()
+            if conn is not None:
+                with conn:
+                    conn.executemany("DELETE FROM answers WHERE id = ?", [(e["id"],) for e in stale if e["id"] is not None])
+        except Exception as e:
+            print(f"[⚠️ ANSWER CACHE INVALIDATE ERROR] {e}")
+
+    print(f"[🧹 ANSWER CACHE] Invalidated {len(stale)} answer(s) citing {', '.join(sorted(source_names))}")
+    return len(stale)
+
+
+def stats():
+    lookups = _stats["hits"] + _stats["misses"]
+    return {**_stats, "hit_rate": _stats["hits"] / lookups if lookups else 0.0, "entries": len(_load())}
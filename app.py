@@ -1,17 +1,18 @@
 import streamlit as st
 import os
+import time
+import threading
 import utils
-import config
-from datetime import datetime
-from langchain.prompts import PromptTemplate
-from langchain.chains import RetrievalQA
-from langchain_openai import ChatOpenAI
+import answer_cache
+import case_analysis
+import qa_chain as qa
+import metrics
 from db import SessionLocal
 from models import CaseLog
-from pathlib import Path
 
 
 st.set_page_config(page_title="Legal GPT Assistant", layout="wide")
+metrics.start_server()
 os.makedirs("users_temp", exist_ok=True)
 os.makedirs("case_reports", exist_ok=True)
 
@@ -45,14 +46,15 @@ if uploaded_file:
     if st.session_state.get("last_uploaded") != filename:
         uploaded = utils.upload_pdf(uploaded_file, filename)
         st.sidebar.success(f"{uploaded} uploaded to cloud.")
-        utils.create_embeddings(force=True, specific_file=f"legal-files/{filename}")
+        utils.create_embeddings(force=True, specific_file=f"legal-files/{filename}", tagging="deferred")
+        threading.Thread(target=utils.backfill_tags, daemon=True).start()
         st.session_state["last_uploaded"] = filename
     else:
         st.sidebar.info(f"{filename} already uploaded this session.")
 
 
 st.sidebar.subheader("📂 Stored PDFs in Azure Blob:")
-pdf_files = [f for f in utils.list_files() if f.endswith(".pdf") and f.startswith("legal-files/")]
+pdf_files = [f for f in utils.list_files("legal-files/") if f.endswith(".pdf")]
 for pdf in pdf_files:
     col1, col2 = st.sidebar.columns([0.75, 0.25])
     col1.markdown(f"📄 `{os.path.basename(pdf)}`")
@@ -66,45 +68,37 @@ if st.sidebar.button("🔄 Rebuild Embeddings"):
     st.sidebar.success("Embeddings rebuilt successfully from cloud PDFs.")
 
 # === LLM Setup ===
-def load_llm(temp=0.0):
-    return ChatOpenAI(api_key=config.OPENAI_API_KEY, model=config.GPT_MODEL, temperature=temp)
-
-def setup_qa_chain(query, temp=0.0, k=10):
-    query_lang = utils.detect_language(query)
-    docs = utils.direct_qdrant_search(query, lang=query_lang, k=k)
-
-    if not docs:
+def setup_qa_chain(query, **kwargs):
+    qa_chain, docs = qa.setup_qa_chain(query, **kwargs)
+    if qa_chain is None:
         st.error("No relevant documents retrieved. Check embeddings or query.")
-        return None, None
-
-
-    llm = load_llm(temp)
-
-    prompt_template = """You are a legal assistant. Use the context below to answer the user's question.
-                        If the answer is not present, reply:
-                        "Sorry, the information you're asking for isn't available in the provided documents."
+    return qa_chain, docs
 
-                        Context:
-                        {context}
 
-                        Question:
-                        {question}
+def timed_stream(tokens, started, timings):
+    """Pass tokens through while recording time-to-first-token and total time."""
+    for token in tokens:
+        if "ttft" not in timings:
+            timings["ttft"] = time.perf_counter() - started
+        yield token
+    timings["total"] = time.perf_counter() - started
+    timings.setdefault("ttft", timings["total"])
 
-                        Answer:"""
 
-    PROMPT = PromptTemplate(template=prompt_template, input_variables=["context", "question"])
+def format_source(doc):
+    metadata = doc.metadata or {}
+    filename = metadata.get("source", "Unknown file")
+    page = metadata.get("page", "Unknown page")
+    text_excerpt = doc.page_content.strip().replace("\n", " ")[:300]
+    return f"**File:** `{filename}` | **Page:** `{page}`\n\n```text\n{text_excerpt}...\n```"
 
-    def manual_qa_chain(query):
-        context = "\n\n".join([doc.page_content for doc in docs])
-        prompt = PROMPT.format(context=context, question=query)
-        result = llm.invoke(prompt)
-        return {"result": result.content, "source_documents": docs}
 
-    return manual_qa_chain, docs
+def render_sources(sources):
+    with st.expander("📖 View Sources"):
+        for i, s in enumerate(sources, 1):
+            st.markdown(f"**Source {i}:**")
+            st.markdown(s)
 
-    
-
-    
 
 
 # === UI Tabs ===
@@ -117,35 +111,40 @@ with tab1:
         st.session_state["history"] = []
 
     query = st.text_input("Type your legal question:")
+    selected_docs = st.multiselect(
+        "Restrict to documents (optional):",
+        [os.path.basename(f) for f in pdf_files],
+    )
 
+    live_answer = False
     if st.button("Submit Question"):
-        with st.spinner("Retrieving answer..."):
-            qa_chain, _ = setup_qa_chain(query=query, temp=0.0, k=10)
-            if qa_chain is None:
-                st.error("No law documents available. Please upload at least one PDF.")
-            else:
-                response = qa_chain(query)
-                answer = response["result"]
-
-                sources = []
-                for doc in response["source_documents"]:
-                    metadata = doc.metadata or {}
-                    filename = metadata.get("source", "Unknown file")
-                    page = metadata.get("page", "Unknown page")
-                    text_excerpt = doc.page_content.strip().replace("\n", " ")[:300]
-                    sources.append(f"**File:** `{filename}` | **Page:** `{page}`\n\n```text\n{text_excerpt}...\n```")
-
-                st.session_state.history.insert(0, (query, answer, sources))
-
-
-    for q, a, src in st.session_state.history:
+        started = time.perf_counter()
+        filters = {"source": selected_docs} if selected_docs else None
+        with st.spinner("Retrieving documents..."):
+            qa_chain, docs = setup_qa_chain(query=query, temp=0.0, k=10, filters=filters)
+        if qa_chain is None:
+            st.error("No law documents available. Please upload at least one PDF.")
+        else:
+            sources = [format_source(doc) for doc in docs]
+            st.markdown(f"**Question:** {query}")
+            render_sources(sources)
+
+            timings = {}
+            response = qa_chain(query, stream=True)
+            st.markdown("**Answer:**")
+            answer = st.write_stream(timed_stream(response["stream"], started, timings))
+            st.caption(f"⏱️ First token in {timings['ttft']:.2f}s · full answer in {timings['total']:.2f}s")
+            st.divider()
+
+            st.session_state.history.insert(0, (query, answer, sources))
+            live_answer = True
+
+    # The newest answer was already rendered while streaming
+    for q, a, src in st.session_state.history[1 if live_answer else 0:]:
         st.markdown(f"**Question:** {q}")
         st.markdown(f"**Answer:** {a}")
         if "Sorry, the information you're asking for isn't available" not in a:
-            with st.expander("📖 View Sources"):
-                for i, s in enumerate(src, 1):
-                    st.markdown(f"**Source {i}:**")
-                    st.markdown(s)
+            render_sources(src)
         st.divider()
 
 # === Tab 2 ===
@@ -175,15 +174,21 @@ with tab2:
             lang = utils.detect_language(case_text)  
             st.markdown(f"**Detected Language:** `{lang}`")
 
-            with st.spinner("Analyzing case and generating advice..."):
-                qa_chain, _ = setup_qa_chain(query= case_text, temp=0.5, k=10)
-                if qa_chain is None:
-                    st.error("No law documents found.")
-                else:
-                    #response = qa_chain({"query": case_text})
-                    response = qa_chain(case_text)
-                    advice = response["result"]
+            started = time.perf_counter()
+            with st.spinner("Retrieving relevant laws..."):
+                qa_chain, docs = setup_qa_chain(query=case_text, temp=0.5, k=10, retrieve=case_analysis.retrieve_for_case)
+            if qa_chain is None:
+                st.error("No law documents found.")
+            else:
+                render_sources([format_source(doc) for doc in docs])
+
+                timings = {}
+                response = qa_chain(case_text, stream=True)
+                st.markdown("### 📾 Legal Advice:")
+                advice = st.write_stream(timed_stream(response["stream"], started, timings))
+                st.caption(f"⏱️ First token in {timings['ttft']:.2f}s · full advice in {timings['total']:.2f}s")
 
+                with metrics.span("db_write", table="case_logs"):
                     db = SessionLocal()
                     new_case = CaseLog(
                         case_title=case_pdf.name,
@@ -193,34 +198,36 @@ with tab2:
                     db.add(new_case)
                     db.commit()
                     db.refresh(new_case)
-                    st.success(f"Saved to DB as Case ID: {new_case.id}")
-
-                    st.markdown("### 📾 Legal Advice:")
-                    st.markdown(advice)
-
-                    if "Sorry, the information you're asking for isn't available" not in advice:
-                        with st.expander("📖 View Sources"):
-                            for i, doc in enumerate(response["source_documents"], 1):
-                                meta = doc.metadata or {}
-                                filename = meta.get("source", "Unknown file")
-                                page = meta.get("page", "Unknown page")
-                                excerpt = doc.page_content.strip().replace("\n", " ")[:300]
-                                st.markdown(f"**File:** `{filename}` | **Page:** `{page}`\n\n```text\n{excerpt}...\n```")
+                st.success(f"Saved to DB as Case ID: {new_case.id}")
 
 # === Tab 3 ===
 with tab3:
     st.title("🛠️ Admin Dashboard")
+    st.subheader("⚡ Retrieval Cache")
+    cache_stats = utils.search_cache.stats()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Hit rate", f"{cache_stats['hit_rate']:.0%}")
+    c2.metric("Memory hits", cache_stats["memory_hits"])
+    c3.metric("Disk hits", cache_stats["disk_hits"])
+    c4.metric("Misses", cache_stats["misses"])
+    answer_stats = answer_cache.stats()
+    st.caption(f"Answer cache: {answer_stats['hits']} hit(s), {answer_stats['misses']} miss(es), {answer_stats['entries']} stored answer(s)")
+    if st.button("🔤 Rebuild Keyword (BM25) Index"):
+        with st.spinner("Re-reading every indexed chunk into the keyword index..."):
+            utils.rebuild_sparse_index()
+        st.success("Keyword index rebuilt.")
+
     st.subheader("📋 Case History")
     st.subheader("🕷️ Crawl UAE Legal Sites")
 
     if st.button("🔁 Start Full Crawl"):
-        with st.spinner("Crawling sites, downloading PDFs, saving to Azure..."):
+        with st.spinner("Crawling sites, indexing new pages as they arrive and archiving them to Azure..."):
             from crawler.scraper import crawl_all_sites
-            new_blobs = crawl_all_sites(force=False)
-            for blob in new_blobs:
-                utils.create_embeddings(force=False, specific_file=blob)
-           
-            st.success("Crawling and embedding complete.")
+            with utils.StreamingIngestor(tagging="deferred") as ingestor:
+                new_blobs = crawl_all_sites(force=False, ingestor=ingestor)
+            threading.Thread(target=utils.backfill_tags, daemon=True).start()
+
+            st.success(f"Crawling and embedding complete: {len(new_blobs)} new or changed document(s).")
 
     db = SessionLocal()
     search_term = st.text_input("🔍 Search cases by keyword:")
@@ -1,11 +1,193 @@
-from transformers import AutoTokenizer, AutoModel
-import torch
+import os
+import threading
+import numpy as np
+import config
 
-tokenizer = AutoTokenizer.from_pretrained("aubmindlab/bert-base-arabertv2")
-model = AutoModel.from_pretrained("aubmindlab/bert-base-arabertv2")
+MODEL_NAME = "aubmindlab/bert-base-arabertv2"
+MAX_TOKENS = 512
+
+_lock = threading.RLock()
+_tokenizer = None
+_model = None
+_onnx_session = None
+
+
+# === Model loading (lazy, so importing utils no longer loads BERT) ===
+
+def _load():
+    global _tokenizer, _model, _onnx_session
+    with _lock:
+        if _model is None:
+            import torch
+            from transformers import AutoTokenizer, AutoModel
+
+            torch.set_num_threads(config.TORCH_NUM_THREADS)
+            _tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+            _model = AutoModel.from_pretrained(MODEL_NAME).eval()
+            print(f"[AraBERT] Loaded {MODEL_NAME} ({config.TORCH_NUM_THREADS} torch thread(s))")
+
+            if config.ARABERT_BACKEND == "onnx":
+                _onnx_session = _load_onnx_session()
+    return _tokenizer, _model
+
+
+def _onnx_paths():
+    return (
+        os.path.join(config.ARABERT_ONNX_DIR, "arabert.onnx"),
+        os.path.join(config.ARABERT_ONNX_DIR, "arabert.int8.onnx"),
+    )
+
+
+def export_onnx():
+    """Export the model to ONNX and quantize its weights to int8; returns the quantized path."""
+    import torch
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    fp32_path, int8_path = _onnx_paths()
+    os.makedirs(config.ARABERT_ONNX_DIR, exist_ok=True)
+    dummy = _tokenizer(["نص تجريبي"], return_tensors="pt")
+    torch.onnx.export(
+        _model,
+        (dummy["input_ids"], dummy["attention_mask"], dummy["token_type_ids"]),
+        fp32_path,
+        input_names=["input_ids", "attention_mask", "token_type_ids"],
+        output_names=["last_hidden_state"],
+        dynamic_axes={name: {0: "batch", 1: "sequence"} for name in ("input_ids", "attention_mask", "token_type_ids", "last_hidden_state")},
+        opset_version=17,
+    )
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    print(f"[AraBERT] Exported int8 ONNX model to {int8_path}")
+    return int8_path
+
+
+def _load_onnx_session():
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        print("[⚠️ AraBERT] onnxruntime is not installed, using the torch backend")
+        return None
+
+    _, int8_path = _onnx_paths()
+    try:
+        if not os.path.exists(int8_path):
+            export_onnx()
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = config.TORCH_NUM_THREADS
+        session = ort.InferenceSession(int8_path, options, providers=["CPUExecutionProvider"])
+    except Exception as e:
+        print(f"[⚠️ AraBERT] ONNX backend unavailable ({e}), using the torch backend")
+        return None
+
+    min_cosine = check_onnx_parity(session)
+    if min_cosine < config.ARABERT_PARITY_MIN_COSINE:
+        print(f"[⚠️ AraBERT] ONNX parity {min_cosine:.4f} < {config.ARABERT_PARITY_MIN_COSINE}, using the torch backend")
+        return None
+    print(f"[AraBERT] Using int8 ONNX backend (parity {min_cosine:.4f})")
+    return session
+
+
+# === Forward passes ===
+
+def _forward_torch(input_ids, attention_mask):
+    import torch
 
-def get_arabic_embedding(text: str):
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
     with torch.no_grad():
-        outputs = model(**inputs)
-    return outputs.last_hidden_state.mean(dim=1).squeeze().tolist()
+        outputs = _model(
+            input_ids=torch.from_numpy(input_ids),
+            attention_mask=torch.from_numpy(attention_mask),
+            token_type_ids=torch.zeros_like(torch.from_numpy(input_ids)),
+        )
+    return outputs.last_hidden_state.numpy()
+
+
+def _forward_onnx(session, input_ids, attention_mask):
+    return session.run(["last_hidden_state"], {
+        "input_ids": input_ids,
+        "attention_mask": attention_mask,
+        "token_type_ids": np.zeros_like(input_ids),
+    })[0]
+
+
+def _windows(ids):
+    """Split token ids longer than MAX_TOKENS into overlapping windows, each wrapped in [CLS] ... [SEP]."""
+    if len(ids) <= MAX_TOKENS:
+        return [ids]
+    cls_id, body, sep_id = ids[0], ids[1:-1], ids[-1]
+    size = MAX_TOKENS - 2
+    windows = []
+    for start in range(0, len(body), config.ARABERT_WINDOW_STRIDE):
+        windows.append([cls_id] + body[start:start + size] + [sep_id])
+        if start + size >= len(body):
+            break
+    return windows
+
+
+def _embed(texts, batch_size, session=None):
+    tokenizer, _ = _load()
+    encoded = tokenizer(list(texts), add_special_tokens=True, truncation=False, verbose=False)["input_ids"]
+
+    # (text index, window ids); long texts contribute several windows
+    segments = [(i, window) for i, ids in enumerate(encoded) for window in _windows(ids)]
+    # Sorting by length keeps padding inside each batch to a minimum
+    segments.sort(key=lambda segment: len(segment[1]))
+
+    pooled = np.zeros((len(texts), _model.config.hidden_size), dtype=np.float64)
+    weights = np.zeros(len(texts), dtype=np.float64)
+    for start in range(0, len(segments), batch_size):
+        batch = segments[start:start + batch_size]
+        width = len(batch[-1][1])
+        input_ids = np.full((len(batch), width), tokenizer.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(batch), width), dtype=np.int64)
+        for row, (_, ids) in enumerate(batch):
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+
+        if session is not None:
+            hidden = _forward_onnx(session, input_ids, attention_mask)
+        else:
+            hidden = _forward_torch(input_ids, attention_mask)
+
+        mask = attention_mask[..., None].astype(hidden.dtype)
+        sums = (hidden * mask).sum(axis=1)
+        for row, (text_index, ids) in enumerate(batch):
+            # Windows are combined weighted by their token count, i.e. a mean over all tokens
+            pooled[text_index] += sums[row]
+            weights[text_index] += len(ids)
+
+    return pooled / np.maximum(weights, 1)[:, None]
+
+
+# === Public API ===
+
+def get_arabic_embeddings(texts, batch_size=None):
+    if not texts:
+        return []
+    _load()
+    vectors = _embed(texts, batch_size or config.ARABERT_BATCH_SIZE, _onnx_session)
+    return vectors.astype(np.float32).tolist()
+
+
+def get_arabic_embedding(text: str):
+    return get_arabic_embeddings([text])[0]
+
+
+PARITY_PROBES = [
+    "يحق للعامل الحصول على إجازة سنوية مدفوعة الأجر.",
+    "المادة 5: يسري هذا المرسوم بقانون على العاملين في القطاع الخاص.",
+    "Unemployment insurance benefits are paid for a maximum of three months.",
+]
+
+
+def check_onnx_parity(session=None, texts=None):
+    """Minimum cosine similarity between ONNX and torch mean-pooled vectors for the probe texts."""
+    _load()
+    session = session or _onnx_session
+    if session is None:
+        raise RuntimeError("ONNX backend is not loaded")
+    texts = texts or PARITY_PROBES
+    reference = _embed(texts, len(texts))
+    candidate = _embed(texts, len(texts), session)
+    cosines = (reference * candidate).sum(axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    )
+    return float(cosines.min())
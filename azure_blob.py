@@ -1,48 +1,137 @@
 import os
+import time
+import threading
+import requests
 import config
+import blob_cache
+from azure.core.exceptions import HttpResponseError, ResourceExistsError
+from azure.core.pipeline.transport import RequestsTransport
 from azure.storage.blob import BlobServiceClient
+from clients import get_client
 
 
 # Load values from env or config
 AZURE_CONTAINER_NAME = os.getenv("AZURE_CONTAINER_NAME", "legal-files")
 AZURE_CONNECTION_STRING = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
 
-def get_blob_service_client():
+_container_lock = threading.Lock()
+_container_ready = False
+# Blob name -> ETag as of this process's latest listing, upload or download
+_etags = {}
+# Prefix -> (expires_at, blob names); our own uploads and deletes invalidate matching prefixes
+_listings = {}
+_listings_lock = threading.Lock()
+
+def _create_blob_service_client():
     if not AZURE_CONNECTION_STRING:
         raise ValueError("AZURE_STORAGE_CONNECTION_STRING is not set in environment variables.")
-    return BlobServiceClient.from_connection_string(AZURE_CONNECTION_STRING)
+    # One keep-alive session shared by every upload, download, delete and list
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=config.HTTP_POOL_MAXSIZE,
+        pool_maxsize=config.HTTP_POOL_MAXSIZE,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return BlobServiceClient.from_connection_string(
+        AZURE_CONNECTION_STRING,
+        transport=RequestsTransport(session=session, session_owner=False),
+    )
 
-def upload_file(local_path, blob_name):
-    blob_service = get_blob_service_client()
-    container_client = blob_service.get_container_client(AZURE_CONTAINER_NAME)
+def get_blob_service_client():
+    return get_client(
+        "azure_blob",
+        _create_blob_service_client,
+        health_check=lambda client: client.get_container_client(AZURE_CONTAINER_NAME).exists(),
+    )
+
+def _container_client():
+    return get_blob_service_client().get_container_client(AZURE_CONTAINER_NAME)
+
+def _ensure_container(container_client):
+    """Create the container on the first upload of the process instead of trying on every call."""
+    global _container_ready
+    if _container_ready:
+        return
+    with _container_lock:
+        if not _container_ready:
+            try:
+                container_client.create_container()
+            except ResourceExistsError:
+                pass
+            except HttpResponseError as e:
+                # Container-scoped SAS credentials may not create containers; the container exists then
+                if e.status_code != 403:
+                    raise
+            _container_ready = True
 
-    # Create container if not exists
-    try:
-        container_client.create_container()
-    except Exception:
-        pass
+def upload_file(local_path, blob_name):
+    container_client = _container_client()
+    _ensure_container(container_client)
 
     blob_client = container_client.get_blob_client(blob_name)
     with open(local_path, "rb") as f:
-        blob_client.upload_blob(f, overwrite=True)
+        result = blob_client.upload_blob(f, overwrite=True, max_concurrency=config.BLOB_MAX_CONCURRENCY)
+    # What we just uploaded is what a later download would fetch
+    _etags[blob_name] = result.get("etag")
+    blob_cache.put(blob_name, result.get("etag"), local_path)
+    _invalidate_listings(blob_name)
     print(f"[Azure Blob] Uploaded: {blob_name}")
 
 def download_file(blob_name, local_path):
-    blob_service = get_blob_service_client()
-    blob_client = blob_service.get_container_client(AZURE_CONTAINER_NAME).get_blob_client(blob_name)
+    blob_client = _container_client().get_blob_client(blob_name)
+
+    etag = _etags.get(blob_name)
+    if etag is None and config.BLOB_CACHE_DIR:
+        # A metadata request is far cheaper than re-downloading a blob we may already hold
+        etag = blob_client.get_blob_properties().etag
+    if blob_cache.copy_to(blob_name, etag, local_path):
+        return
 
+    # Stream straight to disk in parallel ranges instead of buffering the whole blob in memory
+    downloader = blob_client.download_blob(max_concurrency=config.BLOB_MAX_CONCURRENCY)
     with open(local_path, "wb") as f:
-        data = blob_client.download_blob()
-        f.write(data.readall())
+        downloader.readinto(f)
+    _etags[blob_name] = downloader.properties.etag
+    blob_cache.put(blob_name, downloader.properties.etag, local_path)
     print(f"[Azure Blob] Downloaded: {blob_name}")
 
 def delete_file(blob_name):
-    blob_service = get_blob_service_client()
-    blob_client = blob_service.get_container_client(AZURE_CONTAINER_NAME).get_blob_client(blob_name)
+    blob_client = _container_client().get_blob_client(blob_name)
     blob_client.delete_blob()
+    _etags.pop(blob_name, None)
+    _invalidate_listings(blob_name)
     print(f"[Azure Blob] Deleted: {blob_name}")
 
-def list_files():
-    blob_service = get_blob_service_client()
-    container_client = blob_service.get_container_client(AZURE_CONTAINER_NAME)
-    return [blob.name for blob in container_client.list_blobs()]
+def list_files(prefix="", cached=True):
+    """Names of the blobs under prefix, listed server-side page by page.
+
+    With cached=True a listing younger than BLOB_LIST_CACHE_TTL seconds is
+    reused; pass cached=False where blobs written by other processes must show up.
+    """
+    now = time.monotonic()
+    if cached:
+        with _listings_lock:
+            entry = _listings.get(prefix)
+        if entry and entry[0] > now:
+            return list(entry[1])
+
+    names = []
+    pages = _container_client().list_blobs(
+        name_starts_with=prefix or None,
+        results_per_page=config.BLOB_LIST_PAGE_SIZE,
+    ).by_page()
+    for page in pages:
+        for blob in page:
+            # The listing carries every blob's ETag, so cached copies are validated without extra requests
+            _etags[blob.name] = blob.etag
+            names.append(blob.name)
+
+    with _listings_lock:
+        _listings[prefix] = (now + config.BLOB_LIST_CACHE_TTL, names)
+    return list(names)
+
+def _invalidate_listings(blob_name):
+    with _listings_lock:
+        for prefix in [p for p in _listings if blob_name.startswith(p)]:
+            del _listings[prefix]
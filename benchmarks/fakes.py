@@ -0,0 +1,161 @@
+import os
+import re
+import json
+import time
+import random
+import shutil
+import hashlib
+import threading
+import numpy as np
+
+
+# Local stand-ins for OpenAI, Qdrant and Azure Blob. Each one sleeps for a
+# configurable latency before answering so network-bound paths can be
+# benchmarked offline and deterministically.
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def sleep_ms(ms, jitter=0.2, rng=random):
+    if ms > 0:
+        time.sleep(ms / 1000 * rng.uniform(1 - jitter, 1 + jitter))
+
+
+def hash_embedding(text, dim):
+    """Normalized bag-of-words hashing vector, so similar texts still land near each other."""
+    vector = np.zeros(dim, dtype=np.float32)
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        digest = hashlib.md5(token.encode("utf-8")).digest()
+        index = int.from_bytes(digest[:4], "little") % dim
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).tolist()
+
+
+class FakeEmbeddings:
+    """OpenAIEmbeddings look-alike: one round trip per call, whatever the batch size."""
+
+    def __init__(self, latency_ms=0, dim=1536):
+        self.latency_ms = latency_ms
+        self.dim = dim
+        self.calls = 0
+
+    def embed_documents(self, texts, *args, **kwargs):
+        self.calls += 1
+        sleep_ms(self.latency_ms)
+        return [hash_embedding(text, self.dim) for text in texts]
+
+    def embed_query(self, text):
+        self.calls += 1
+        sleep_ms(self.latency_ms)
+        return hash_embedding(text, self.dim)
+
+
+class FakeArabicEmbedder:
+    """Replaces the AraBERT forward pass; latency_ms is charged per batch."""
+
+    def __init__(self, latency_ms=0, dim=768):
+        self.latency_ms = latency_ms
+        self.dim = dim
+
+    def get_arabic_embeddings(self, texts, batch_size=None):
+        sleep_ms(self.latency_ms)
+        return [hash_embedding(text, self.dim) for text in texts]
+
+    def get_arabic_embedding(self, text):
+        return self.get_arabic_embeddings([text])[0]
+
+
+class _Message:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeChatModel:
+    """ChatOpenAI look-alike: first_token_ms before the first chunk, token_ms between chunks."""
+
+    ANSWER = (
+        "Based on the provided documents, the relevant provisions set out the rights and obligations "
+        "of the parties, the applicable notice periods and the competent authority for complaints."
+    )
+
+    def __init__(self, first_token_ms=0, token_ms=0):
+        self.first_token_ms = first_token_ms
+        self.token_ms = token_ms
+        self.calls = 0
+
+    def _reply(self, prompt):
+        if "Excerpts (JSON):" in prompt:
+            excerpts = json.loads(prompt.split("Excerpts (JSON):", 1)[1])
+            return json.dumps([{"id": item["id"], "tags": ["labour", "insurance"]} for item in excerpts])
+        if prompt.startswith("Assign"):
+            return "labour, insurance"
+        return self.ANSWER
+
+    def invoke(self, prompt, *args, **kwargs):
+        self.calls += 1
+        sleep_ms(self.first_token_ms)
+        reply = self._reply(prompt)
+        sleep_ms(self.token_ms * len(reply.split()))
+        return _Message(reply)
+
+    def stream(self, prompt, *args, **kwargs):
+        self.calls += 1
+        sleep_ms(self.first_token_ms)
+        for i, word in enumerate(self._reply(prompt).split()):
+            if i:
+                sleep_ms(self.token_ms)
+            yield _Message(word + " ")
+
+
+class LatencyProxy:
+    """Wraps a client so every method call waits latency_ms first (e.g. an in-memory QdrantClient)."""
+
+    def __init__(self, target, latency_ms=0):
+        self._target = target
+        self._latency_ms = latency_ms
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            sleep_ms(self._latency_ms)
+            return attr(*args, **kwargs)
+        return call
+
+
+class FakeBlobStore:
+    """In-process container: blob name -> local file, with latency on every operation."""
+
+    def __init__(self, latency_ms=0):
+        self.latency_ms = latency_ms
+        self.blobs = {}
+        self._lock = threading.Lock()
+
+    def add_directory(self, directory, prefix):
+        for name in sorted(os.listdir(directory)):
+            if name.lower().endswith((".pdf", ".html")):
+                self.blobs[f"{prefix}{name}"] = os.path.join(directory, name)
+
+    def list_files(self, prefix="", cached=True):
+        sleep_ms(self.latency_ms)
+        with self._lock:
+            return [name for name in self.blobs if name.startswith(prefix)]
+
+    def download_file(self, blob_name, download_path):
+        sleep_ms(self.latency_ms)
+        with self._lock:
+            source = self.blobs[blob_name]
+        shutil.copyfile(source, download_path)
+
+    def upload_file(self, file_path, blob_name):
+        sleep_ms(self.latency_ms)
+        with self._lock:
+            self.blobs[blob_name] = file_path
+
+    def delete_file(self, blob_name):
+        sleep_ms(self.latency_ms)
+        with self._lock:
+            self.blobs.pop(blob_name, None)
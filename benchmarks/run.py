@@ -0,0 +1,258 @@
+"""Offline benchmarks for the ingestion and query hot paths.
+
+    python benchmarks/run.py --openai-ms 150 --qdrant-ms 40 --blob-ms 60 --output bench.json
+    python benchmarks/run.py --baseline bench.json   # exit code 1 on regressions
+
+OpenAI, Qdrant (an in-memory QdrantClient) and Azure Blob are replaced by the
+stand-ins in fakes.py; PDF extraction, chunking, tagging batches, the sparse
+index, fusion, context building and caching all run for real.
+"""
+import os
+import io
+import sys
+import json
+import time
+import logging
+import argparse
+import resource
+import platform
+import tempfile
+import contextlib
+import subprocess
+from datetime import datetime, timezone
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import config
+import utils
+import qa_chain
+import extractors
+import search_cache
+import vector_store
+from qdrant_client import QdrantClient
+from fakes import FakeEmbeddings, FakeArabicEmbedder, FakeChatModel, LatencyProxy, FakeBlobStore
+
+SAMPLE_DIRS = ("data", "users_temp")
+
+QUERIES = [
+    "What are the conditions to receive unemployment insurance benefits?",
+    "How long is the annual leave for a domestic worker?",
+    "Article 12 termination of the employment contract",
+    "Who can file a complaint against a recruitment agency?",
+    "ما هي شروط استحقاق التعويض في نظام التأمين ضد التعطل عن العمل؟",
+    "حقوق العامل المساعد في الإجازة السنوية",
+]
+
+# (section, metric, True if higher is better) compared against --baseline
+TRACKED = [
+    ("extraction", "pages_per_sec", True),
+    ("ingestion", "chunks_per_sec", True),
+    ("search", "p95_ms", False),
+    ("qa_chain", "p95_ms", False),
+    ("qa_chain", "ttft_p95_ms", False),
+]
+
+
+def percentiles(samples_ms):
+    if not samples_ms:
+        return {"n": 0}
+    values = np.asarray(samples_ms)
+    return {
+        "n": len(values),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def sample_pdfs():
+    paths = []
+    for directory in SAMPLE_DIRS:
+        full = os.path.join(REPO_ROOT, directory)
+        if os.path.isdir(full):
+            paths += [os.path.join(full, name) for name in sorted(os.listdir(full)) if name.lower().endswith(".pdf")]
+    return paths
+
+
+def install_fakes(args, workdir):
+    """Point every external dependency at a stand-in and every on-disk artefact at workdir."""
+    embeddings = FakeEmbeddings(args.openai_ms)
+    arabert = FakeArabicEmbedder(args.arabert_ms)
+    llm = FakeChatModel(args.llm_first_token_ms, args.llm_token_ms)
+    qdrant = LatencyProxy(QdrantClient(":memory:"), args.qdrant_ms)
+    blobs = FakeBlobStore(args.blob_ms)
+    for directory in SAMPLE_DIRS:
+        if os.path.isdir(os.path.join(REPO_ROOT, directory)):
+            blobs.add_directory(os.path.join(REPO_ROOT, directory), "legal-files/")
+
+    utils.get_embeddings = lambda: embeddings
+    utils.get_llm = lambda temp=None: llm
+    qa_chain.get_llm = lambda temp=None: llm
+    utils.get_qdrant_client = vector_store.get_qdrant_client = lambda: qdrant
+    utils.get_arabic_embeddings = arabert.get_arabic_embeddings
+    utils.get_arabic_embedding = arabert.get_arabic_embedding
+    utils.list_files, utils.download_file = blobs.list_files, blobs.download_file
+    utils.upload_file, utils.delete_file = blobs.upload_file, blobs.delete_file
+
+    utils.TEMP_DIR = os.path.join(workdir, "temp")
+    os.makedirs(utils.TEMP_DIR, exist_ok=True)
+    utils.EMBED_RECORD_PATH = os.path.join(workdir, "embedded_files.json")
+    utils.CHUNK_MANIFEST_PATH = os.path.join(workdir, "chunk_manifest.json")
+    search_cache.INDEX_VERSION_PATH = os.path.join(workdir, "index_version.json")
+    config.SPARSE_INDEX_DIR = os.path.join(workdir, "sparse_index")
+    config.LOCAL_VECTOR_DIR = os.path.join(workdir, "local_vectors")
+    config.VECTOR_BACKEND = args.backend
+    # Measure the real work: no extraction, disk search or answer caches
+    config.EXTRACTION_CACHE_DIR = ""
+    config.SEARCH_CACHE_DIR = ""
+    config.ANSWER_CACHE_ENABLED = False
+    config.TAGGING_MODE = args.tagging
+
+
+def bench_extraction(paths):
+    pages, errors, started = 0, [], time.perf_counter()
+    for path in paths:
+        try:
+            pages += len(extractors.extract_text(path))
+        except Exception as e:
+            errors.append(f"{os.path.basename(path)}: {e}")
+    seconds = time.perf_counter() - started
+    return {
+        "files": len(paths),
+        "pages": pages,
+        "seconds": round(seconds, 3),
+        "pages_per_sec": round(pages / seconds, 2) if seconds else None,
+        "errors": errors,
+    }
+
+
+def bench_ingestion():
+    started = time.perf_counter()
+    utils.create_embeddings(force=True)
+    seconds = time.perf_counter() - started
+    chunks = sum(len(entry["chunks"]) for entry in utils.load_chunk_manifest().values())
+    return {
+        "chunks": chunks,
+        "seconds": round(seconds, 3),
+        "chunks_per_sec": round(chunks / seconds, 2) if seconds else None,
+        "points": {c: vector_store.get_vector_store().count(c) for c in vector_store.COLLECTIONS},
+    }
+
+
+def bench_search(iterations, k):
+    samples = []
+    for i in range(iterations):
+        query = QUERIES[i % len(QUERIES)]
+        search_cache.clear()
+        started = time.perf_counter()
+        utils.direct_qdrant_search(query, lang=utils.detect_language(query), k=k)
+        samples.append((time.perf_counter() - started) * 1000)
+    return percentiles(samples)
+
+
+def bench_qa_chain(iterations, k):
+    samples, ttft, no_docs = [], [], 0
+    for i in range(iterations):
+        query = QUERIES[i % len(QUERIES)]
+        search_cache.clear()
+        started = time.perf_counter()
+        chain, _ = qa_chain.setup_qa_chain(query, temp=0.0, k=k)
+        if chain is None:
+            no_docs += 1
+            continue
+        for j, _ in enumerate(chain(query, stream=True)["stream"]):
+            if j == 0:
+                ttft.append((time.perf_counter() - started) * 1000)
+        samples.append((time.perf_counter() - started) * 1000)
+    stats = percentiles(samples)
+    stats.update({f"ttft_{key}": value for key, value in percentiles(ttft).items() if key != "n"})
+    stats["no_docs"] = no_docs
+    return stats
+
+
+def compare(results, baseline, tolerance):
+    """Return human-readable regressions of the TRACKED metrics beyond tolerance (a fraction)."""
+    regressions = []
+    for section, metric, higher_is_better in TRACKED:
+        new, old = results.get(section, {}).get(metric), baseline.get(section, {}).get(metric)
+        if not new or not old:
+            continue
+        change = (new - old) / old
+        if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+            regressions.append(f"{section}.{metric}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--openai-ms", type=float, default=120, help="latency per embeddings call")
+    parser.add_argument("--arabert-ms", type=float, default=30, help="latency per AraBERT batch")
+    parser.add_argument("--llm-first-token-ms", type=float, default=400)
+    parser.add_argument("--llm-token-ms", type=float, default=15)
+    parser.add_argument("--qdrant-ms", type=float, default=40, help="latency per Qdrant call")
+    parser.add_argument("--blob-ms", type=float, default=60, help="latency per Blob call")
+    parser.add_argument("--backend", choices=sorted(vector_store.BACKENDS), default="qdrant")
+    parser.add_argument("--tagging", choices=["inline", "deferred", "off"], default="inline")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--output", default=os.path.join(REPO_ROOT, "benchmarks", "results", "latest.json"))
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--verbose", action="store_true", help="keep the pipeline's own logging")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="legal_gpt_bench_")
+    install_fakes(args, workdir)
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    if not args.verbose:
+        # qdrant-client warns that payload indexes are a no-op in the in-memory mode
+        logging.getLogger().setLevel(logging.ERROR)
+
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "settings": {key: value for key, value in vars(args).items() if key not in ("output", "baseline", "verbose")},
+    }
+    with quiet:
+        results["extraction"] = bench_extraction(sample_pdfs())
+        results["ingestion"] = bench_ingestion()
+        results["search"] = bench_search(args.iterations, args.k)
+        results["qa_chain"] = bench_qa_chain(args.iterations, args.k)
+    results["peak_rss_mb"] = peak_rss_mb()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(json.dumps({key: results[key] for key in ("extraction", "ingestion", "search", "qa_chain", "peak_rss_mb")}, indent=2))
+    print(f"[📊] Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"[⚠️ REGRESSION] {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"[✅] No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
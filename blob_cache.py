@@ -0,0 +1,92 @@
+import os
+import re
+import shutil
+import hashlib
+import threading
+import config
+import metrics
+
+
+# Local copies of Azure blobs, keyed by blob name + ETag. A blob whose ETag is
+# unchanged is served from disk; a new ETag is a new entry, and stale versions
+# age out with the oldest-first eviction once BLOB_CACHE_MAX_MB is exceeded.
+
+_lock = threading.Lock()
+
+
+def _entry_path(blob_name, etag):
+    name_hash = hashlib.sha256(blob_name.encode("utf-8")).hexdigest()[:32]
+    version = re.sub(r"[^0-9A-Za-z]", "", etag)
+    extension = os.path.splitext(blob_name)[1].lower()
+    return os.path.join(config.BLOB_CACHE_DIR, f"{name_hash}-{version}{extension}")
+
+
+def get(blob_name, etag):
+    """Path of the cached copy of blob_name at etag, or None."""
+    if not config.BLOB_CACHE_DIR or not etag:
+        return None
+    path = _entry_path(blob_name, etag)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        metrics.inc("cache_requests_total", cache="blob", result="miss")
+        return None
+    metrics.inc("cache_requests_total", cache="blob", result="hit")
+    return path
+
+
+def copy_to(blob_name, etag, local_path):
+    """Copy the cached blob to local_path; False on a miss."""
+    path = get(blob_name, etag)
+    if path is None:
+        return False
+    try:
+        shutil.copyfile(path, local_path)
+    except FileNotFoundError:
+        # Evicted between the lookup and the copy
+        return False
+    print(f"[BLOB CACHE HIT] {blob_name}")
+    return True
+
+
+def put(blob_name, etag, local_path):
+    """Keep a copy of local_path, the content of blob_name at etag (just uploaded or downloaded)."""
+    if not config.BLOB_CACHE_DIR or not etag:
+        return
+    os.makedirs(config.BLOB_CACHE_DIR, exist_ok=True)
+    path = _entry_path(blob_name, etag)
+    tmp_path = os.path.join(config.BLOB_CACHE_DIR, f".{os.path.basename(path)}.{threading.get_ident()}.tmp")
+    try:
+        shutil.copyfile(local_path, tmp_path)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"[⚠️ BLOB CACHE WRITE ERROR] {blob_name}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return
+    _evict()
+
+
+def _evict():
+    max_bytes = config.BLOB_CACHE_MAX_MB * 1024 * 1024
+    with _lock:
+        entries = []
+        for name in os.listdir(config.BLOB_CACHE_DIR):
+            if name.startswith("."):
+                continue
+            path = os.path.join(config.BLOB_CACHE_DIR, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,81 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+import config
+import utils
+from fusion import reciprocal_rank_fusion
+
+
+# Map-reduce retrieval for long case documents: the case is split into
+# issue-sized segments, each segment is searched on its own in parallel and the
+# ranked lists are fused with reciprocal-rank fusion before one advice call.
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n|\n(?=\s*(?:\d+[\.\)]|[-•*]|Article\s+\d+|المادة\s+\d+|مادة\s+\d+))")
+
+
+def split_case_into_issues(case_text, max_chars=None, max_segments=None):
+    max_chars = max_chars or config.CASE_SEGMENT_CHARS
+    max_segments = max_segments or config.CASE_MAX_SEGMENTS
+
+    paragraphs = [p.strip() for p in PARAGRAPH_BREAK.split(case_text) if p and p.strip()]
+    if not paragraphs:
+        return []
+
+    # Widen segments rather than dropping issues when the case is very long
+    total = sum(len(p) for p in paragraphs)
+    max_chars = max(max_chars, -(-total // max_segments))
+
+    segments, current = [], ""
+    for paragraph in paragraphs:
+        while len(paragraph) > max_chars:
+            if current:
+                segments.append(current)
+                current = ""
+            segments.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+        if current and len(current) + len(paragraph) + 1 > max_chars:
+            segments.append(current)
+            current = ""
+        current = f"{current}\n{paragraph}" if current else paragraph
+    if current:
+        segments.append(current)
+
+    # Greedy packing can still overshoot max_segments; fold fragments too short
+    # to search and then the smallest neighbouring pairs together so no text is lost
+    def merge(i):
+        segments[i:i + 2] = [f"{segments[i]}\n{segments[i + 1]}"]
+
+    i = 0
+    while len(segments) > 1 and i < len(segments):
+        if len(segments[i]) < 20:
+            merge(i - 1 if i else i)
+        else:
+            i += 1
+    while len(segments) > max_segments:
+        merge(min(range(len(segments) - 1), key=lambda i: len(segments[i]) + len(segments[i + 1])))
+
+    return [s for s in segments if len(s) >= 20]
+
+
+def retrieve_for_case(case_text, lang="en", k=10):
+    segments = split_case_into_issues(case_text)
+    if not segments:
+        return utils.direct_qdrant_search(case_text, lang=lang, k=k)
+
+    k_per_segment = max(config.CASE_K_PER_SEGMENT, -(-k // len(segments)))
+
+    def search(segment):
+        segment_lang = utils.detect_language(segment)
+        if segment_lang == "unknown":
+            segment_lang = lang
+        try:
+            return utils.direct_qdrant_search(segment, lang=segment_lang, k=k_per_segment)
+        except Exception as e:
+            print(f"[CASE SEARCH ERROR] {e}")
+            return []
+
+    with ThreadPoolExecutor(max_workers=min(len(segments), config.CASE_SEARCH_WORKERS)) as pool:
+        ranked_lists = list(pool.map(search, segments))
+
+    docs = reciprocal_rank_fusion(ranked_lists, k=k)
+    print(f"[CASE RETRIEVAL] {len(segments)} segment(s), {sum(len(r) for r in ranked_lists)} hit(s) fused into {len(docs)} source(s)")
+    return docs
@@ -0,0 +1,125 @@
+import threading
+import time
+import httpx
+import config
+
+
+# Process-wide registry: modules stay imported across Streamlit reruns and
+# sessions, so clients (and their keep-alive pools) are built once per process.
+_lock = threading.RLock()
+_clients = {}
+
+
+def get_client(name, factory, health_check=None):
+    """Return the shared client `name`, building it lazily and rebuilding it if its health check fails.
+
+    The health check runs outside the registry lock, in the one caller that
+    found it due; everyone else keeps getting the current client meanwhile.
+    """
+    with _lock:
+        entry = _clients.get(name)
+        now = time.monotonic()
+        if entry is None:
+            entry = {"client": factory(), "checked_at": now}
+            _clients[name] = entry
+            return entry["client"]
+        if not health_check or now - entry["checked_at"] <= config.CLIENT_HEALTH_CHECK_INTERVAL:
+            return entry["client"]
+        # Claim the check so concurrent callers don't pile onto a slow endpoint
+        entry["checked_at"] = now
+
+    try:
+        health_check(entry["client"])
+        return entry["client"]
+    except Exception as e:
+        print(f"[♻️ CLIENT RECONNECT] {name}: {e}")
+    client = factory()
+    with _lock:
+        if _clients.get(name) is entry:
+            # The old client is not closed: requests already holding it may still be
+            # running, and its connections are released once they drop it
+            _clients[name] = {"client": client, "checked_at": time.monotonic()}
+        else:
+            _close(client)
+        return _clients[name]["client"]
+
+
+def reset_client(name=None):
+    """Drop one shared client (or all of them) so the next call reconnects."""
+    with _lock:
+        names = [name] if name else list(_clients)
+        for key in names:
+            entry = _clients.pop(key, None)
+            if entry:
+                _close(entry["client"])
+
+
+def _close(client):
+    try:
+        close = getattr(client, "close", None)
+        if close:
+            close()
+    except Exception as e:
+        print(f"[⚠️ CLIENT CLOSE ERROR] {e}")
+
+
+def get_http_client():
+    return get_client("openai_http", lambda: httpx.Client(
+        timeout=httpx.Timeout(config.OPENAI_TIMEOUT, connect=10.0),
+        limits=httpx.Limits(
+            max_connections=config.HTTP_POOL_MAXSIZE,
+            max_keepalive_connections=config.HTTP_POOL_MAXSIZE,
+            keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+        ),
+    ))
+
+
+def get_qdrant_client():
+    from qdrant_client import QdrantClient
+
+    return get_client(
+        "qdrant",
+        lambda: QdrantClient(
+            host=config.QDRANT_HOST,
+            port=config.QDRANT_PORT,
+            https=config.QDRANT_USE_HTTPS,
+            api_key=config.QDRANT_API_KEY,
+            timeout=config.QDRANT_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=config.HTTP_POOL_MAXSIZE,
+                max_keepalive_connections=config.HTTP_POOL_MAXSIZE,
+                keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+            ),
+        ),
+        health_check=lambda client: client.get_collections(),
+    )
+
+
+def get_embeddings():
+    from langchain_openai import OpenAIEmbeddings
+
+    return get_client(
+        f"embeddings:{config.EMBEDDING_MODEL}",
+        lambda: OpenAIEmbeddings(
+            api_key=config.OPENAI_API_KEY,
+            model=config.EMBEDDING_MODEL,
+            http_client=get_http_client(),
+        ),
+    )
+
+
+def get_llm(temp=None):
+    from langchain_openai import ChatOpenAI
+
+    kwargs = {} if temp is None else {"temperature": temp}
+    return get_client(
+        f"llm:{config.GPT_MODEL}:{temp}",
+        lambda: ChatOpenAI(
+            api_key=config.OPENAI_API_KEY,
+            model=config.GPT_MODEL,
+            http_client=get_http_client(),
+            # Report token usage on the final streamed chunk too (see metrics.record_llm_usage)
+            stream_usage=True,
+            **kwargs,
+        ),
+    )
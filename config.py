@@ -23,4 +23,124 @@ QDRANT_HOST = os.getenv("QDRANT_HOST","6ef14677-369c-4c22-91f6-413cdc7d7c93.euro
 QDRANT_PORT = int(os.getenv("QDRANT_PORT", 443))
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 QDRANT_USE_HTTPS = os.getenv("QDRANT_USE_HTTPS", "true").lower() == "true"
+QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", 30))
 
+# Shared client pools (see clients.py)
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", 120))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", 20))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 60))
+CLIENT_HEALTH_CHECK_INTERVAL = float(os.getenv("CLIENT_HEALTH_CHECK_INTERVAL", 60))
+
+
+# Ingestion batching
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 64))
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", 256))
+
+# Chunk tagging: "inline" (before upsert), "deferred" (utils.backfill_tags) or "off"
+TAGGING_MODE = os.getenv("TAGGING_MODE", "inline")
+TAG_BATCH_SIZE = int(os.getenv("TAG_BATCH_SIZE", 20))
+
+# Query-side retrieval cache (see search_cache.py); leave SEARCH_CACHE_DIR empty for memory only
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", 512))
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 2048))
+SEARCH_CACHE_DIR = os.getenv("SEARCH_CACHE_DIR", ".search_cache")
+SEARCH_CACHE_DISK_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_DISK_MAX_ENTRIES", 10000))
+
+# Semantic answer cache (see answer_cache.py)
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", 0.95))
+# Mean-pooled AraBERT vectors sit much closer together than OpenAI's, so Arabic
+# needs a stricter bar; a value above 1 disables the cache for Arabic
+ANSWER_CACHE_THRESHOLD_AR = float(os.getenv("ANSWER_CACHE_THRESHOLD_AR", 0.99))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 2000))
+
+# Concurrent ingestion (see ratelimit.py)
+INGEST_MAX_WORKERS = int(os.getenv("INGEST_MAX_WORKERS", 8))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", 8))
+QDRANT_MAX_CONCURRENCY = int(os.getenv("QDRANT_MAX_CONCURRENCY", 4))
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", 6))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", 1.0))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", 60.0))
+
+# Per-page OCR (see extractors.extract_text)
+OCR_DPI = int(os.getenv("OCR_DPI", 300))
+OCR_MAX_WORKERS = int(os.getenv("OCR_MAX_WORKERS", os.cpu_count() or 1))
+OCR_MIN_CHARS = int(os.getenv("OCR_MIN_CHARS", 20))
+OCR_MIN_LETTER_RATIO = float(os.getenv("OCR_MIN_LETTER_RATIO", 0.5))
+
+# Extraction cache (see extraction_cache.py)
+EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR", ".extract_cache")
+EXTRACTION_CACHE_MAX_MB = int(os.getenv("EXTRACTION_CACHE_MAX_MB", 512))
+# Local copies of Azure blobs keyed by name + ETag (see blob_cache.py); empty disables
+BLOB_CACHE_DIR = os.getenv("BLOB_CACHE_DIR", ".blob_cache")
+BLOB_CACHE_MAX_MB = int(os.getenv("BLOB_CACHE_MAX_MB", 2048))
+# Parallel range requests per blob upload / download
+BLOB_MAX_CONCURRENCY = int(os.getenv("BLOB_MAX_CONCURRENCY", 4))
+# Blob listings: server-side page size and how long a prefix listing is reused (0 disables)
+BLOB_LIST_PAGE_SIZE = int(os.getenv("BLOB_LIST_PAGE_SIZE", 5000))
+BLOB_LIST_CACHE_TTL = float(os.getenv("BLOB_LIST_CACHE_TTL", 60))
+
+# AraBERT embedder (see arabic_embedder.py); ARABERT_BACKEND is "torch" or "onnx" (int8)
+TORCH_NUM_THREADS = int(os.getenv("TORCH_NUM_THREADS", os.cpu_count() or 1))
+ARABERT_BATCH_SIZE = int(os.getenv("ARABERT_BATCH_SIZE", 16))
+ARABERT_WINDOW_STRIDE = int(os.getenv("ARABERT_WINDOW_STRIDE", 384))
+ARABERT_BACKEND = os.getenv("ARABERT_BACKEND", "torch")
+ARABERT_ONNX_DIR = os.getenv("ARABERT_ONNX_DIR", "./embeddings/arabert_onnx")
+ARABERT_PARITY_MIN_COSINE = float(os.getenv("ARABERT_PARITY_MIN_COSINE", 0.99))
+
+# Case analysis map-reduce retrieval (see case_analysis.py)
+CASE_SEGMENT_CHARS = int(os.getenv("CASE_SEGMENT_CHARS", 1500))
+CASE_MAX_SEGMENTS = int(os.getenv("CASE_MAX_SEGMENTS", 8))
+CASE_K_PER_SEGMENT = int(os.getenv("CASE_K_PER_SEGMENT", 6))
+CASE_SEARCH_WORKERS = int(os.getenv("CASE_SEARCH_WORKERS", 8))
+RRF_K = int(os.getenv("RRF_K", 60))
+
+# Prompt context assembly (see context_builder.py)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 3000))
+CONTEXT_DEDUP_THRESHOLD = float(os.getenv("CONTEXT_DEDUP_THRESHOLD", 0.8))
+CONTEXT_USE_MMR = os.getenv("CONTEXT_USE_MMR", "false").lower() == "true"
+CONTEXT_MMR_LAMBDA = float(os.getenv("CONTEXT_MMR_LAMBDA", 0.7))
+
+# Hybrid dense + BM25 retrieval (see sparse_index.py)
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+HYBRID_SPARSE_WEIGHT = float(os.getenv("HYBRID_SPARSE_WEIGHT", 1.0))
+SPARSE_INDEX_DIR = os.getenv("SPARSE_INDEX_DIR", "./embeddings/sparse_index")
+BM25_K1 = float(os.getenv("BM25_K1", 1.5))
+BM25_B = float(os.getenv("BM25_B", 0.75))
+SEARCH_POOL_WORKERS = int(os.getenv("SEARCH_POOL_WORKERS", 8))
+
+# Cross-lingual retrieval: search both collections in parallel and merge
+CROSS_LINGUAL_SEARCH = os.getenv("CROSS_LINGUAL_SEARCH", "false").lower() == "true"
+CROSS_LINGUAL_WEIGHTS = {
+    "uae_law_openai": float(os.getenv("CROSS_LINGUAL_OPENAI_WEIGHT", 1.0)),
+    "uae_law_arabert": float(os.getenv("CROSS_LINGUAL_ARABERT_WEIGHT", 1.0)),
+}
+
+# Vector storage backend (see vector_store.py): "qdrant" or "local"
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant")
+LOCAL_VECTOR_DIR = os.getenv("LOCAL_VECTOR_DIR", "./embeddings/local_vectors")
+# Serve dense search from the local snapshot when the Qdrant search fails or times out
+VECTOR_FALLBACK_LOCAL = os.getenv("VECTOR_FALLBACK_LOCAL", "false").lower() == "true"
+
+# Observability (see metrics.py): Prometheus endpoint (0 disables) and JSON log lines
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))
+JSON_LOGS = os.getenv("JSON_LOGS", "false").lower() == "true"
+
+# Crawler (see crawler/scraper.py)
+CRAWL_USER_AGENT = os.getenv("CRAWL_USER_AGENT", "LegalGPTBot/1.0 (+https://www.moj.gov.ae)")
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", 16))
+CRAWL_PER_HOST_CONCURRENCY = int(os.getenv("CRAWL_PER_HOST_CONCURRENCY", 4))
+CRAWL_HOST_DELAY = float(os.getenv("CRAWL_HOST_DELAY", 0.25))
+CRAWL_TIMEOUT = float(os.getenv("CRAWL_TIMEOUT", 30))
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", 0))
+CRAWL_SAME_HOST_ONLY = os.getenv("CRAWL_SAME_HOST_ONLY", "true").lower() == "true"
+CRAWL_RESPECT_ROBOTS = os.getenv("CRAWL_RESPECT_ROBOTS", "true").lower() == "true"
+CRAWL_JS_MIN_TEXT_CHARS = int(os.getenv("CRAWL_JS_MIN_TEXT_CHARS", 200))
+CRAWL_FRONTIER_PATH = os.getenv("CRAWL_FRONTIER_PATH", os.path.join("crawler", "frontier.sqlite3"))
+CRAWL_REFRESH_HOURS = float(os.getenv("CRAWL_REFRESH_HOURS", 24))
+# Headless Chrome pool for JavaScript-rendered pages (see crawler/browser_pool.py)
+SELENIUM_POOL_SIZE = int(os.getenv("SELENIUM_POOL_SIZE", min(4, os.cpu_count() or 1)))
+SELENIUM_MAX_PAGES_PER_DRIVER = int(os.getenv("SELENIUM_MAX_PAGES_PER_DRIVER", 50))
+SELENIUM_REQUEST_STORAGE_MAX = int(os.getenv("SELENIUM_REQUEST_STORAGE_MAX", 100))
+# URL regexes selenium-wire captures while looking for a PDF, besides the page URL itself
+SELENIUM_PDF_SCOPES = [s for s in os.getenv("SELENIUM_PDF_SCOPES", r"(?i)\.pdf").split(",") if s]
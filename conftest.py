@@ -0,0 +1,7 @@
+import os
+
+# config.py refuses to import without a key; these tests never call OpenAI
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+# A manual end-to-end script (live crawl, Qdrant, Azure), not a unit test
+collect_ignore = ["test_pipeline.py"]
@@ -0,0 +1,146 @@
+import re
+import tiktoken
+from langchain.docstore.document import Document
+import config
+
+
+# Builds the prompt context from retrieved chunks: overlapping chunks of the
+# same source/page (chunk_overlap=200 at ingestion) are merged, near-duplicates
+# are dropped, optional MMR reorders for diversity and a token budget caps size.
+
+_encoding = None
+
+MIN_OVERLAP_CHARS = 40
+MIN_TRUNCATED_TOKENS = 50
+
+
+class _ApproxEncoding:
+    """~4 characters per token; used when tiktoken cannot load its BPE files (offline)."""
+
+    def encode(self, text):
+        return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        try:
+            try:
+                _encoding = tiktoken.encoding_for_model(config.GPT_MODEL)
+            except KeyError:
+                _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"[⚠️ TIKTOKEN] {e}; approximating token counts")
+            _encoding = _ApproxEncoding()
+    return _encoding
+
+
+def count_tokens(text):
+    return len(_get_encoding().encode(text))
+
+
+def _shingles(text, size=3):
+    words = re.findall(r"\w+", text.lower())
+    return {tuple(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+
+
+def _jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def _merge_overlap(first, second):
+    """Join two chunks if one ends where the other begins; None when they don't overlap."""
+    for a, b in ((first, second), (second, first)):
+        head = b[:MIN_OVERLAP_CHARS]
+        start = a.find(head)
+        while start != -1:
+            if b.startswith(a[start:]):
+                return a[:start] + b
+            start = a.find(head, start + 1)
+    return None
+
+
+def _merge_same_page(docs):
+    merged = []
+    for doc in docs:
+        text = doc.page_content.strip()
+        meta = doc.metadata or {}
+        for i, kept in enumerate(merged):
+            kept_meta = kept.metadata or {}
+            if (kept_meta.get("source"), kept_meta.get("page")) != (meta.get("source"), meta.get("page")):
+                continue
+            if text in kept.page_content:
+                break
+            if kept.page_content in text:
+                combined = text
+            else:
+                combined = _merge_overlap(kept.page_content, text)
+            if combined:
+                merged[i] = Document(page_content=combined, metadata=kept.metadata)
+                break
+        else:
+            merged.append(Document(page_content=text, metadata=doc.metadata))
+    return merged
+
+
+def _drop_near_duplicates(docs, threshold):
+    # Only within a page: across sources, near-identical text (an amended article vs. the
+    # original, "30 days" vs "45 days") is exactly what must not be dropped
+    kept, kept_shingles = [], {}
+    for doc in docs:
+        meta = doc.metadata or {}
+        page_shingles = kept_shingles.setdefault((meta.get("source"), meta.get("page")), [])
+        shingles = _shingles(doc.page_content)
+        if any(_jaccard(shingles, other) >= threshold for other in page_shingles):
+            continue
+        kept.append(doc)
+        page_shingles.append(shingles)
+    return kept
+
+
+def _mmr(docs, lambda_mult):
+    """Greedy MMR using retrieval rank as relevance and shingle overlap as similarity."""
+    shingles = [_shingles(doc.page_content) for doc in docs]
+    relevance = [1.0 - i / len(docs) for i in range(len(docs))]
+    selected, remaining = [], list(range(len(docs)))
+    while remaining:
+        best = max(remaining, key=lambda i: lambda_mult * relevance[i] - (1 - lambda_mult) * max(
+            (_jaccard(shingles[i], shingles[j]) for j in selected), default=0.0
+        ))
+        selected.append(best)
+        remaining.remove(best)
+    return [docs[i] for i in selected]
+
+
+def build_context(docs, token_budget=None, use_mmr=None):
+    """Return (context, docs_used) with the context kept within token_budget tokens."""
+    token_budget = token_budget or config.CONTEXT_TOKEN_BUDGET
+    use_mmr = config.CONTEXT_USE_MMR if use_mmr is None else use_mmr
+
+    candidates = _drop_near_duplicates(_merge_same_page(docs), config.CONTEXT_DEDUP_THRESHOLD)
+    if use_mmr and len(candidates) > 1:
+        candidates = _mmr(candidates, config.CONTEXT_MMR_LAMBDA)
+
+    encoding = _get_encoding()
+    separator_tokens = count_tokens("\n\n")
+    parts, used, total = [], [], 0
+    for doc in candidates:
+        tokens = encoding.encode(doc.page_content)
+        cost = len(tokens) + (separator_tokens if parts else 0)
+        if total + cost > token_budget:
+            remaining = token_budget - total - (separator_tokens if parts else 0)
+            if remaining >= MIN_TRUNCATED_TOKENS:
+                text = encoding.decode(tokens[:remaining])
+                parts.append(text)
+                used.append(Document(page_content=text, metadata=doc.metadata))
+                total += remaining
+            break
+        parts.append(doc.page_content)
+        used.append(doc)
+        total += cost
+
+    print(f"[CONTEXT] {len(docs)} chunk(s) -> {len(used)} after merge/dedup, {total}/{token_budget} tokens")
+    return "\n\n".join(parts), used
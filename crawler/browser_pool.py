@@ -0,0 +1,129 @@
+import re
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import config
+import metrics
+
+
+# Pool of headless Chrome drivers for the pages plain HTTP can't handle. Each
+# executor thread owns one driver, so SELENIUM_POOL_SIZE pages render in
+# parallel from the executor's shared queue. selenium-wire only captures the
+# requests a task scopes it to, its request store is bounded and cleared after
+# every page, and a driver is replaced after SELENIUM_MAX_PAGES_PER_DRIVER
+# pages so Chrome's own memory growth is capped too.
+
+# Scope regex that matches no URL: rendering HTML needs no captured traffic
+NO_CAPTURE = r"(?!)"
+
+
+def _create_driver():
+    from seleniumwire import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument('--headless=new')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    # Text is all we keep; skip image downloads and decoding
+    options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    driver = webdriver.Chrome(options=options, seleniumwire_options={
+        "request_storage": "memory",
+        "request_storage_max_size": config.SELENIUM_REQUEST_STORAGE_MAX,
+    })
+    driver.set_page_load_timeout(config.CRAWL_TIMEOUT)
+    driver.scopes = [NO_CAPTURE]
+    return driver
+
+
+def _wait_until_loaded(driver, timeout):
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    WebDriverWait(driver, timeout).until(lambda d: d.execute_script("return document.readyState") == "complete")
+
+
+def _load(driver, url):
+    driver.get(url)
+    _wait_until_loaded(driver, config.CRAWL_TIMEOUT)
+
+
+def render_page(driver, url):
+    """Return the rendered HTML of url."""
+    driver.scopes = [NO_CAPTURE]
+    _load(driver, url)
+    return driver.page_source
+
+
+def intercept_pdf(driver):
+    for request in driver.iter_requests():
+        if request.response and 'application/pdf' in request.response.headers.get('Content-Type', ''):
+            return request.response.body
+    return None
+
+
+def fetch_pdf(driver, url):
+    """Load a document link that only serves its PDF to a real browser and return the intercepted bytes."""
+    driver.scopes = [re.escape(url)] + config.SELENIUM_PDF_SCOPES
+    _load(driver, url)
+    return intercept_pdf(driver)
+
+
+class DriverPool:
+    def __init__(self, size=None, max_pages=None):
+        self.size = size or config.SELENIUM_POOL_SIZE
+        self.max_pages = max_pages or config.SELENIUM_MAX_PAGES_PER_DRIVER
+        self.executor = ThreadPoolExecutor(self.size, thread_name_prefix="selenium")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._drivers = set()
+
+    def _checkout(self):
+        driver = getattr(self._local, "driver", None)
+        if driver is not None and self._local.pages >= self.max_pages:
+            print(f"[♻️ DRIVER RECYCLE] after {self._local.pages} pages")
+            self._discard(driver)
+            driver = None
+        if driver is None:
+            driver = _create_driver()
+            self._local.driver, self._local.pages = driver, 0
+            with self._lock:
+                self._drivers.add(driver)
+            metrics.inc("selenium_drivers_started_total")
+        return driver
+
+    def _discard(self, driver):
+        with self._lock:
+            self._drivers.discard(driver)
+        self._local.driver = None
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"[⚠️ DRIVER QUIT ERROR] {e}")
+
+    def _call(self, task, url):
+        driver = self._checkout()
+        try:
+            return task(driver, url)
+        except Exception:
+            # A timed-out or crashed Chrome is not worth reusing
+            self._discard(driver)
+            raise
+        finally:
+            if self._local.driver is driver:
+                self._local.pages += 1
+                del driver.requests
+
+    async def run(self, task, url):
+        """Run task(driver, url) on a pooled driver without blocking the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self._call, task, url)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        with self._lock:
+            drivers, self._drivers = list(self._drivers), set()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception as e:
+                print(f"[⚠️ DRIVER QUIT ERROR] {e}")
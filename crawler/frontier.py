@@ -0,0 +1,120 @@
+import os
+import time
+import sqlite3
+import threading
+import config
+
+
+# Persistent crawl frontier: one row per URL per site with its crawl status for
+# the current run plus the validators (ETag / Last-Modified) and content hash
+# of the last fetch. A run interrupted half-way resumes from the pending rows;
+# a new run re-queues every known URL so unchanged pages cost a 304 or a hash
+# comparison instead of an upload.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    site TEXT NOT NULL,
+    url TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT,
+    blob_path TEXT,
+    fetched_at REAL,
+    changed_at REAL,
+    error TEXT,
+    PRIMARY KEY (site, url)
+);
+CREATE INDEX IF NOT EXISTS pages_status ON pages (site, status);
+CREATE TABLE IF NOT EXISTS runs (
+    site TEXT PRIMARY KEY,
+    started_at REAL NOT NULL,
+    finished_at REAL
+);
+"""
+
+
+class CrawlFrontier:
+    def __init__(self, path=None):
+        self.path = path or config.CRAWL_FRONTIER_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def _execute(self, sql, params=()):
+        with self._lock, self._conn:
+            return self._conn.execute(sql, params).fetchall()
+
+    # === Runs ===
+
+    def has_unfinished_run(self, site):
+        rows = self._execute("SELECT finished_at FROM runs WHERE site = ?", (site,))
+        return bool(rows) and rows[0]["finished_at"] is None
+
+    def begin(self, site, start_url):
+        """Start or resume a run; returns the (url, depth) pairs to crawl and every URL already known."""
+        if self.has_unfinished_run(site):
+            print(f"[↩️ RESUME] Continuing the interrupted crawl of {site}")
+        else:
+            self._execute(
+                "INSERT INTO runs (site, started_at, finished_at) VALUES (?, ?, NULL) "
+                "ON CONFLICT(site) DO UPDATE SET started_at = excluded.started_at, finished_at = NULL",
+                (site, time.time()),
+            )
+            # Re-check everything seen before; validators make unchanged pages cheap
+            self._execute("UPDATE pages SET status = 'pending' WHERE site = ?", (site,))
+        self.add(site, start_url, 0)
+
+        pending = self._execute(
+            "SELECT url, depth FROM pages WHERE site = ? AND status = 'pending' ORDER BY depth", (site,)
+        )
+        known = self._execute("SELECT url FROM pages WHERE site = ?", (site,))
+        return [(row["url"], row["depth"]) for row in pending], {row["url"] for row in known}
+
+    def finish(self, site):
+        self._execute("UPDATE runs SET finished_at = ? WHERE site = ?", (time.time(), site))
+
+    # === Pages ===
+
+    def add(self, site, url, depth):
+        self._execute(
+            "INSERT INTO pages (site, url, depth) VALUES (?, ?, ?) "
+            "ON CONFLICT(site, url) DO UPDATE SET depth = MIN(depth, excluded.depth)",
+            (site, url, depth),
+        )
+
+    def get(self, site, url):
+        rows = self._execute("SELECT * FROM pages WHERE site = ? AND url = ?", (site, url))
+        return dict(rows[0]) if rows else None
+
+    def mark_done(self, site, url, etag=None, last_modified=None, content_hash=None, blob_path=None, changed=False):
+        """Record a successful fetch; validators and hash are only overwritten when given."""
+        now = time.time()
+        self._execute(
+            "UPDATE pages SET status = 'done', error = NULL, fetched_at = ?, "
+            "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified), "
+            "content_hash = COALESCE(?, content_hash), blob_path = COALESCE(?, blob_path), "
+            "changed_at = CASE WHEN ? THEN ? ELSE changed_at END "
+            "WHERE site = ? AND url = ?",
+            (now, etag, last_modified, content_hash, blob_path, changed, now, site, url),
+        )
+
+    def mark_error(self, site, url, error):
+        self._execute(
+            "UPDATE pages SET status = 'error', error = ?, fetched_at = ? WHERE site = ? AND url = ?",
+            (str(error)[:500], time.time(), site, url),
+        )
+
+    def stats(self, site):
+        rows = self._execute("SELECT status, COUNT(*) AS n FROM pages WHERE site = ? GROUP BY status", (site,))
+        return {row["status"]: row["n"] for row in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
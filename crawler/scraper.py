@@ -3,12 +3,19 @@ import re
 import yaml
 import time
 import json
+import asyncio
+import hashlib
+import threading
 from datetime import datetime
 from urllib.parse import urljoin, urlparse, urlunparse
-from seleniumwire import webdriver
-from selenium.webdriver.chrome.options import Options
+from urllib.robotparser import RobotFileParser
+import httpx
 from bs4 import BeautifulSoup
 from azure_blob import upload_file
+import config
+import metrics
+from crawler.frontier import CrawlFrontier
+from crawler.browser_pool import DriverPool, render_page, fetch_pdf
 
 CRAWLED_RECORD_PATH = os.path.join(os.path.dirname(__file__), "crawled_sites.json")
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), "crawler_config.yaml")
@@ -74,102 +81,340 @@ def normalize_url(url):
 def sanitize_filename(url):
     return re.sub(r'[^a-zA-Z0-9_\-]', '_', url)
 
-def detect_and_download_pdf(driver, url, blob_paths):
-    pdf_content = None
-    for request in driver.requests:
-        if request.response and 'application/pdf' in request.response.headers.get('Content-Type', ''):
-            pdf_content = request.response.body
-            break
-
-    if pdf_content:
-        filename = sanitize_filename(url)[:100] + ".pdf"
-        local_pdf_path = os.path.join(TEMP_SAVE_DIR, filename)
-        with open(local_pdf_path, "wb") as f:
-            f.write(pdf_content)
-        blob_path = f"crawled/pdfs/{filename}"
-        upload_file(local_pdf_path, blob_path)
-        blob_paths.append(blob_path)
-        print(f"[📄 PDF saved via Selenium Wire] {url}")
-    else:
-        print(f"[⚠️ PDF not intercepted] {url}")
-
-
-def crawl_recursive(url, driver, visited, blob_paths, depth=0):
-    if depth > MAX_DEPTH:
-        return
-
-    norm_url = normalize_url(url)
-    if norm_url in visited or not is_valid_url(norm_url):
-        print(f"[SKIP LOOPING] {url}")
-        return
-
-    visited.add(norm_url)  
 
-    try:
-        driver.get(url)
-        time.sleep(2) 
+def is_pdf_url(url):
+    return url.lower().endswith((".pdf", ".pdf.aspx"))
 
-        if url.lower().endswith(".pdf.aspx"):
-            detect_and_download_pdf(driver, url, blob_paths)
-            return
 
-        html = driver.page_source
-        soup = BeautifulSoup(html, "html.parser")
+def needs_javascript(html, soup):
+    """Heuristic: almost no visible text but scripts present means the page is rendered client-side."""
+    if not soup.find("script"):
+        return False
+    visible = " ".join(
+        text.strip() for text in soup.find_all(string=True)
+        if text.parent.name not in ("script", "style", "noscript", "head", "title", "[document]")
+    ).strip()
+    return len(visible) < config.CRAWL_JS_MIN_TEXT_CHARS or "enable javascript" in html.lower()
 
-        filename = sanitize_filename(url)[:100] + ".html"
-        local_path = os.path.join(TEMP_SAVE_DIR, filename)
-        with open(local_path, "w", encoding="utf-8") as f:
-            f.write(f"<!-- SOURCE_URL: {url} -->\n{soup.prettify()}")
 
-        blob_path = f"crawled/html/{filename}"
-        upload_file(local_path, blob_path)
-        blob_paths.append(blob_path)
-        print(f"[📄 HTML saved] {url}")
+def extract_links(url, soup):
+    links = []
+    for a_tag in soup.find_all("a", href=True):
+        link = normalize_url(urljoin(url, a_tag['href'].strip()))
+        if is_valid_url(link) or is_pdf_url(link):
+            links.append(link)
+    return links
 
-        for a_tag in soup.find_all("a", href=True):
-            link = urljoin(url, a_tag['href'].strip())
-            norm_link = normalize_url(link)
-            if is_valid_url(norm_link) and norm_link not in visited:
-                crawl_recursive(norm_link, driver, visited, blob_paths, depth + 1)
 
-    except Exception as e:
-        print(f"[ERROR] Failed to crawl {url}: {e}")
+ARCHIVE_FOLDERS = {".pdf": "crawled/pdfs", ".html": "crawled/html"}
 
 
-def crawl_site(name, url):
-    print(f"[CRAWL START] {name} at {url}")
-    options = Options()
-    options.headless = True
-    options.add_argument('--disable-gpu')
-    options.add_argument('--no-sandbox')
+def archive_name(url, extension):
+    filename = sanitize_filename(url)[:100] + extension
+    return filename, f"{ARCHIVE_FOLDERS[extension]}/{filename}"
+
+
+def html_document(url, soup):
+    """The archived form of a page: prettified HTML tagged with its source URL."""
+    return f"<!-- SOURCE_URL: {url} -->\n{soup.prettify()}".encode("utf-8")
+
 
-    driver = webdriver.Chrome(options=options)
-    visited = set()
-    blob_paths = []
+def archive_document(url, data, extension):
+    """Write data to the temp dir and upload it to Blob; returns the blob path."""
+    filename, blob_path = archive_name(url, extension)
+    local_path = os.path.join(TEMP_SAVE_DIR, filename)
+    with open(local_path, "wb") as f:
+        f.write(data)
+    upload_file(local_path, blob_path)
+    return blob_path
+
+
+# === Selenium fallback (JavaScript-rendered pages only) ===
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool()
+        return _pool
+
+
+def close_selenium():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+# === Async HTTP crawler ===
+
+class HostPolicy:
+    """Per-host politeness: bounded concurrency, a minimum gap between requests and robots.txt rules."""
+
+    def __init__(self, delay):
+        self.semaphore = asyncio.Semaphore(config.CRAWL_PER_HOST_CONCURRENCY)
+        self.delay = delay
+        self.next_request_at = 0.0
+        self.lock = asyncio.Lock()
+        self.robots = None
+        self.ready = asyncio.Event()
+
+    async def wait_turn(self):
+        async with self.lock:
+            now = time.monotonic()
+            wait = self.next_request_at - now
+            self.next_request_at = max(now, self.next_request_at) + self.delay
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+_frontier = None
+
+
+def get_frontier():
+    global _frontier
+    if _frontier is None:
+        _frontier = CrawlFrontier()
+    return _frontier
+
+
+def content_hash(data):
+    return hashlib.sha256(data if isinstance(data, bytes) else data.encode("utf-8")).hexdigest()
+
+
+class AsyncCrawler:
+    def __init__(self, name, start_url, max_depth=MAX_DEPTH, frontier=None, ingestor=None):
+        self.name = name
+        self.start_url = start_url
+        self.start_host = urlparse(start_url).netloc
+        self.max_depth = max_depth
+        self.frontier = frontier or get_frontier()
+        # Optional utils.StreamingIngestor: new content is indexed while it is being archived
+        self.ingestor = ingestor
+        # The frontier is keyed by the configured start URL
+        self.site = start_url
+        self.visited = set()
+        self.blob_paths = []
+        self.hosts = {}
+        self.queue = asyncio.Queue()
+
+    # --- politeness ---
+
+    async def _host(self, client, url):
+        parsed = urlparse(url)
+        policy = self.hosts.get(parsed.netloc)
+        if policy is None:
+            policy = self.hosts[parsed.netloc] = HostPolicy(config.CRAWL_HOST_DELAY)
+            try:
+                if config.CRAWL_RESPECT_ROBOTS:
+                    policy.robots = await self._load_robots(client, f"{parsed.scheme}://{parsed.netloc}/robots.txt")
+                    crawl_delay = policy.robots.crawl_delay(config.CRAWL_USER_AGENT) if policy.robots else None
+                    if crawl_delay:
+                        policy.delay = max(policy.delay, float(crawl_delay))
+            finally:
+                # Even if robots.txt handling blew up, never leave the host's other workers waiting
+                policy.ready.set()
+        else:
+            # Other workers hitting a new host wait until its robots.txt is in
+            await policy.ready.wait()
+        return policy
+
+    async def _load_robots(self, client, robots_url):
+        try:
+            response = await client.get(robots_url)
+        except httpx.HTTPError as e:
+            print(f"[⚠️ ROBOTS] {robots_url}: {e}; assuming allowed")
+            return None
+        if response.status_code >= 400:
+            return None
+        robots = RobotFileParser(robots_url)
+        robots.parse(response.text.splitlines())
+        return robots
+
+    def _in_scope(self, url):
+        return not config.CRAWL_SAME_HOST_ONLY or urlparse(url).netloc == self.start_host
+
+    # --- fetching ---
+
+    async def _get(self, client, url, headers=None):
+        policy = await self._host(client, url)
+        if policy.robots and not policy.robots.can_fetch(config.CRAWL_USER_AGENT, url):
+            print(f"[🤖 ROBOTS DISALLOW] {url}")
+            metrics.inc("crawl_pages_total", result="robots_disallowed")
+            return None
+        async with policy.semaphore:
+            for attempt in range(2):
+                await policy.wait_turn()
+                response = await client.get(url, headers=headers)
+                if response.status_code not in (429, 503) or attempt:
+                    return response
+                # Back off as the host asks, then retry once
+                retry_after = response.headers.get("retry-after", "")
+                await asyncio.sleep(min(float(retry_after) if retry_after.isdigit() else 5.0, 60.0))
+
+    async def _process(self, client, url, depth):
+        known = self.frontier.get(self.site, url) or {}
+        # Conditional GET: unchanged pages come back as an empty 304
+        headers = {}
+        if known.get("etag"):
+            headers["If-None-Match"] = known["etag"]
+        if known.get("last_modified"):
+            headers["If-Modified-Since"] = known["last_modified"]
+
+        with metrics.span("crawl_fetch", method="http") as fields:
+            response = await self._get(client, url, headers)
+            if response is None:
+                self.frontier.mark_error(self.site, url, "disallowed by robots.txt")
+                return
+            fields["http_status"] = response.status_code
+        validators = {"etag": response.headers.get("etag"), "last_modified": response.headers.get("last-modified")}
+
+        if response.status_code == 304:
+            self.frontier.mark_done(self.site, url)
+            metrics.inc("crawl_pages_total", result="not_modified")
+            return
+        if response.status_code >= 400:
+            print(f"[ERROR] HTTP {response.status_code} for {url}")
+            self.frontier.mark_error(self.site, url, f"HTTP {response.status_code}")
+            metrics.inc("crawl_pages_total", result="http_error")
+            return
 
-    crawl_recursive(url, driver, visited, blob_paths)
+        content_type = response.headers.get("content-type", "").lower()
+        if "application/pdf" in content_type or (is_pdf_url(url) and response.content[:4] == b"%PDF"):
+            await self._store(url, ".pdf", response.content, content_hash(response.content), validators, "pdf")
+            return
+        if is_pdf_url(url):
+            with metrics.span("crawl_fetch", method="selenium"):
+                pdf_content = await get_driver_pool().run(fetch_pdf, url)
+            if not pdf_content:
+                print(f"[⚠️ PDF not intercepted] {url}")
+                self.frontier.mark_error(self.site, url, "PDF not intercepted")
+                return
+            await self._store(url, ".pdf", pdf_content, content_hash(pdf_content), validators, "pdf_rendered")
+            return
+        if "html" not in content_type:
+            self.frontier.mark_done(self.site, url, **validators)
+            metrics.inc("crawl_pages_total", result="skipped_type")
+            return
 
-    driver.quit()
-    print(f"[CRAWL END] {name}")
+        html = response.text
+        soup = BeautifulSoup(html, "html.parser")
+        kind = "html"
+        if needs_javascript(html, soup):
+            # Only client-rendered pages pay for a browser; pooled drivers run off the event loop
+            with metrics.span("crawl_fetch", method="selenium"):
+                html = await get_driver_pool().run(render_page, url)
+            soup = BeautifulSoup(html, "html.parser")
+            kind = "html_rendered"
+
+        # Hash the visible text, not the markup, so rotating tokens and timestamps don't count as changes
+        await self._store(url, ".html", html_document(url, soup), content_hash(soup.get_text(" ", strip=True)),
+                          validators, kind)
+
+        if depth < self.max_depth:
+            for link in extract_links(url, soup):
+                self._enqueue(link, depth + 1)
+
+    async def _store(self, url, extension, data, digest, validators, kind):
+        """Archive (and index) data only if its hash differs from the last crawl's."""
+        known = self.frontier.get(self.site, url) or {}
+        if known.get("content_hash") == digest:
+            self.frontier.mark_done(self.site, url, content_hash=digest, **validators)
+            metrics.inc("crawl_pages_total", result="unchanged")
+            print(f"[= UNCHANGED] {url}")
+            return
+        _, blob_path = archive_name(url, extension)
+        if self.ingestor is not None:
+            # Index from memory instead of downloading the archived copy back
+            await asyncio.to_thread(self.ingestor.submit, blob_path, data)
+        await asyncio.to_thread(archive_document, url, data, extension)
+        self.blob_paths.append(blob_path)
+        self.frontier.mark_done(self.site, url, content_hash=digest, blob_path=blob_path, changed=True, **validators)
+        metrics.inc("crawl_pages_total", result=kind)
+        print(f"[📄 {'NEW' if not known.get('content_hash') else 'CHANGED'} {kind.upper()}] {url}")
+
+    def _enqueue(self, url, depth):
+        norm_url = normalize_url(url)
+        if norm_url in self.visited or not self._in_scope(norm_url):
+            return
+        if not (is_valid_url(norm_url) or is_pdf_url(norm_url)):
+            return
+        if config.CRAWL_MAX_PAGES and len(self.visited) >= config.CRAWL_MAX_PAGES:
+            return
+        self.visited.add(norm_url)
+        self.frontier.add(self.site, norm_url, depth)
+        self.queue.put_nowait((norm_url, depth))
+
+    async def _worker(self, client):
+        while True:
+            url, depth = await self.queue.get()
+            try:
+                await self._process(client, url, depth)
+            except Exception as e:
+                print(f"[ERROR] Failed to crawl {url}: {e}")
+                self.frontier.mark_error(self.site, url, e)
+                metrics.inc("crawl_pages_total", result="error")
+            finally:
+                self.queue.task_done()
+
+    async def run(self):
+        limits = httpx.Limits(max_connections=config.CRAWL_CONCURRENCY, max_keepalive_connections=config.CRAWL_CONCURRENCY)
+        async with httpx.AsyncClient(
+            headers={"User-Agent": config.CRAWL_USER_AGENT},
+            timeout=httpx.Timeout(config.CRAWL_TIMEOUT),
+            limits=limits,
+            follow_redirects=True,
+        ) as client:
+            pending, self.visited = self.frontier.begin(self.site, normalize_url(self.start_url))
+            for url, depth in pending:
+                self.queue.put_nowait((url, depth))
+            workers = [asyncio.create_task(self._worker(client)) for _ in range(config.CRAWL_CONCURRENCY)]
+            await self.queue.join()
+            self.frontier.finish(self.site)
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return self.blob_paths
+
+
+def crawl_site(name, url, ingestor=None):
+    print(f"[CRAWL START] {name} at {url}")
+    started = time.perf_counter()
+    crawler = AsyncCrawler(name, url, ingestor=ingestor)
+    try:
+        blob_paths = asyncio.run(crawler.run())
+    finally:
+        close_selenium()
+    print(f"[CRAWL END] {name}: {len(crawler.visited)} URL(s), {len(blob_paths)} new or changed file(s) "
+          f"in {time.perf_counter() - started:.1f}s | {crawler.frontier.stats(crawler.site)}")
     return blob_paths
 
-def crawl_all_sites(force=False):
-    config = load_config()
+def crawl_all_sites(force=False, ingestor=None):
+    """Crawl every configured site that is due; with an ingestor, new content is indexed as it is fetched."""
+    crawler_config = load_config()
     crawled_sites = load_crawled_sites()
     updated = False
     new_files = []
 
-    for site in config.get("sites", []):
+    for site in crawler_config.get("sites", []):
         url = site["url"]
-        if not force and url in crawled_sites:
-            print(f"[SKIP] Already crawled: {url}")
-            continue
-
-        blob_paths = crawl_site(site["name"], url)
-        if blob_paths:
-            new_files.extend(blob_paths)
-            crawled_sites[url] = datetime.utcnow().isoformat()
-            updated = True
+        last_crawled = crawled_sites.get(url)
+        # Interrupted runs always resume; finished sites are re-checked once CRAWL_REFRESH_HOURS have passed
+        if not force and last_crawled and not get_frontier().has_unfinished_run(url):
+            age_hours = (datetime.utcnow() - datetime.fromisoformat(last_crawled)).total_seconds() / 3600
+            if age_hours < config.CRAWL_REFRESH_HOURS:
+                print(f"[SKIP] Crawled {age_hours:.1f}h ago (refresh every {config.CRAWL_REFRESH_HOURS}h): {url}")
+                continue
+
+        blob_paths = crawl_site(site["name"], url, ingestor)
+        new_files.extend(blob_paths)
+        crawled_sites[url] = datetime.utcnow().isoformat()
+        updated = True
 
     if updated:
         save_crawled_sites(crawled_sites)
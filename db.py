@@ -6,7 +6,14 @@ DB_URL = os.getenv("DATABASE_URL")
 if not DB_URL:
     raise RuntimeError("DATABASE_URL is not set in environment variables")
 
-engine = create_engine(DB_URL)
+# Pre-ping replaces dead pooled connections lazily instead of failing the request
+engine = create_engine(
+    DB_URL,
+    pool_pre_ping=True,
+    pool_size=int(os.getenv("DB_POOL_SIZE", 5)),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 10)),
+    pool_recycle=int(os.getenv("DB_POOL_RECYCLE", 1800)),
+)
 SessionLocal = sessionmaker(bind=engine)
 
 Base = declarative_base()
@@ -0,0 +1,92 @@
+import os
+import gzip
+import json
+import hashlib
+import threading
+import config
+import metrics
+
+
+# On-disk cache of extractor output, keyed by the SHA-256 of the source bytes and the
+# extractor version. Entries are gzip'd JSON; access time is tracked via mtime so the
+# oldest entries are evicted first once EXTRACTION_CACHE_MAX_MB is exceeded.
+
+_lock = threading.Lock()
+
+
+def content_sha256(path):
+    if isinstance(path, bytes):
+        return bytes_sha256(path)
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def bytes_sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _entry_path(kind, content_hash, version):
+    return os.path.join(config.EXTRACTION_CACHE_DIR, f"{kind}-v{version}-{content_hash}.json.gz")
+
+
+def get(kind, content_hash, version):
+    if not config.EXTRACTION_CACHE_DIR:
+        return None
+    path = _entry_path(kind, content_hash, version)
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        os.utime(path)
+        print(f"[EXTRACT CACHE HIT] {kind} {content_hash[:12]}")
+        metrics.inc("cache_requests_total", cache="extraction", result="hit")
+        return data
+    except FileNotFoundError:
+        metrics.inc("cache_requests_total", cache="extraction", result="miss")
+        return None
+    except Exception as e:
+        print(f"[⚠️ EXTRACT CACHE READ ERROR] {path}: {e}")
+        return None
+
+
+def put(kind, content_hash, version, data):
+    if not config.EXTRACTION_CACHE_DIR:
+        return
+    os.makedirs(config.EXTRACTION_CACHE_DIR, exist_ok=True)
+    path = _entry_path(kind, content_hash, version)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"[⚠️ EXTRACT CACHE WRITE ERROR] {path}: {e}")
+        return
+    _evict()
+
+
+def _evict():
+    max_bytes = config.EXTRACTION_CACHE_MAX_MB * 1024 * 1024
+    with _lock:
+        entries = []
+        for name in os.listdir(config.EXTRACTION_CACHE_DIR):
+            if not name.endswith(".json.gz"):
+                continue
+            path = os.path.join(config.EXTRACTION_CACHE_DIR, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
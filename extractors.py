@@ -1,52 +1,204 @@
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import fitz  # PyMuPDF
-from pdf2image import convert_from_path
 import pytesseract
+from PIL import Image
 from bs4 import BeautifulSoup
 from readability import Document  
+import config
+import extraction_cache
+import metrics
 
-def extract_text(pdf_path):
+# Bump whenever extraction output changes so cached results are not reused
+EXTRACTOR_VERSION = 2
+
+_ocr_pool = None
+_ocr_pool_lock = threading.Lock()
+
+
+class ExtractionError(Exception):
+    """Raised in strict mode when a document could not be extracted completely."""
+
+
+def _needs_ocr(text):
+    """True when a page's text layer is empty or mostly non-letter garbage (e.g. broken font maps)."""
+    chars = [c for c in text if not c.isspace()]
+    if len(chars) < config.OCR_MIN_CHARS:
+        return True
+    letters = sum(1 for c in chars if c.isalnum())
+    return letters / len(chars) < config.OCR_MIN_LETTER_RATIO or text.count("\ufffd") > len(chars) * 0.1
+
+
+def _init_ocr_worker():
+    # One Tesseract thread per process; parallelism comes from the pool itself
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def _open_pdf(source):
+    """Open a PDF from a path or, for documents still in memory, from its bytes."""
+    if isinstance(source, bytes):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+def _ocr_page(pdf_path, page_index):
+    # Rasterize a single page so memory stays bounded regardless of document length
     try:
-        doc = fitz.open(pdf_path)
-        pages = []
-        for i, page in enumerate(doc):
-            text = page.get_text()
-            if text.strip():
-                pages.append((i + 1, text))
-        if not pages:
-            print(f"[OCR] No text found in {pdf_path}, running Tesseract OCR...")
-            images = convert_from_path(pdf_path)
-            for i, img in enumerate(images):
-                text = pytesseract.image_to_string(img, lang='eng+ara')
-                if text.strip():
-                    pages.append((i + 1, text))
+        with fitz.open(pdf_path) as doc:
+            pix = doc[page_index].get_pixmap(dpi=config.OCR_DPI)
+        image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+        return page_index, pytesseract.image_to_string(image, lang='eng+ara')
+    except Exception as e:
+        print(f"[OCR ERROR] {pdf_path} page {page_index + 1}: {e}")
+        return page_index, None
+
+
+def _get_ocr_pool():
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            _ocr_pool = ProcessPoolExecutor(max_workers=config.OCR_MAX_WORKERS, initializer=_init_ocr_worker)
+        return _ocr_pool
+
+
+def _discard_ocr_pool(pool):
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is pool:
+            _ocr_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _ocr_pages(pdf_path, page_indexes):
+    if isinstance(pdf_path, bytes):
+        # OCR tasks get a path, never the document itself: pickling the bytes into
+        # every per-page task would push the whole PDF through the pool pipes N times
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+            f.write(pdf_path)
+        try:
+            return _ocr_pages(f.name, page_indexes)
+        finally:
+            os.remove(f.name)
+    if len(page_indexes) == 1:
+        return [_ocr_page(pdf_path, page_indexes[0])]
+    for attempt in range(2):
+        pool = _get_ocr_pool()
+        try:
+            return list(pool.map(_ocr_page, [pdf_path] * len(page_indexes), page_indexes))
+        except BrokenProcessPool as e:
+            # A worker killed mid-page (OOM, Tesseract segfault) breaks the pool for good
+            _discard_ocr_pool(pool)
+            print(f"[⚠️ OCR POOL BROKEN] {e}; {'retrying with a fresh pool' if attempt == 0 else 'giving up'}")
+            if attempt:
+                raise
+
+
+def _describe(source):
+    return f"<{len(source)} bytes in memory>" if isinstance(source, bytes) else source
+
+
+def extract_text(pdf_path, content_hash=None, strict=False):
+    """pdf_path may also be the PDF's bytes (e.g. straight from the crawler).
+
+    With strict=True a failure or an OCR page that raised is an ExtractionError
+    instead of an empty or partial result, so indexing can keep the old chunks.
+    """
+    try:
+        content_hash = content_hash or extraction_cache.content_sha256(pdf_path)
+        cached = extraction_cache.get("pdf", content_hash, EXTRACTOR_VERSION)
+        if cached is not None:
+            return [tuple(page) for page in cached]
+
+        with _open_pdf(pdf_path) as doc:
+            texts = [page.get_text() for page in doc]
+
+        ocr_indexes = [i for i, text in enumerate(texts) if _needs_ocr(text)]
+        ocr_failed = False
+        if ocr_indexes:
+            print(f"[OCR] {len(ocr_indexes)}/{len(texts)} page(s) of {_describe(pdf_path)} have no usable text, running Tesseract OCR...")
+            with metrics.span("ocr") as fields:
+                fields["pages"] = len(ocr_indexes)
+                for i, text in _ocr_pages(pdf_path, ocr_indexes):
+                    if text is None:
+                        ocr_failed = True
+                    elif text.strip():
+                        texts[i] = text
+            metrics.inc("ocr_pages_total", len(ocr_indexes))
+
+        pages = [(i + 1, text) for i, text in enumerate(texts) if text.strip()]
+        metrics.inc("pages_extracted_total", len(pages), kind="pdf")
+        # A failed OCR page (Tesseract crash, missing traineddata) must not be cached as empty
+        if not ocr_failed:
+            extraction_cache.put("pdf", content_hash, EXTRACTOR_VERSION, pages)
+        elif strict:
+            raise ExtractionError(f"OCR failed on some pages of {_describe(pdf_path)}")
         return pages
+    except ExtractionError:
+        raise
     except Exception as e:
         print(f"Error extracting text: {e}")
+        if strict:
+            raise ExtractionError(str(e)) from e
         return []
 
-def extract_text_from_html(html_path):
+def extract_text_from_html(html_path, content_hash=None, strict=False):
     try:
+        content_hash = content_hash or extraction_cache.content_sha256(html_path)
+        cached = extraction_cache.get("html", content_hash, EXTRACTOR_VERSION)
+        if cached is not None:
+            return [tuple(page) for page in cached]
+
         with open(html_path, "r", encoding="utf-8") as f:
             html = f.read()
-            doc = Document(html)
-            simplified_html = doc.summary()
-            title = doc.title() or "Untitled"
+        pages = _html_pages(html)
+        extraction_cache.put("html", content_hash, EXTRACTOR_VERSION, pages)
+        return pages
 
-            # Remove unwanted elements
-            soup = BeautifulSoup(simplified_html, "html.parser")
-            for tag in soup(["script", "style", "head", "footer", "nav"]):
-                tag.decompose()
+    except Exception as e:
+        print(f"[ERROR] Couldn't extract HTML text from {html_path}: {e}")
+        if strict:
+            raise ExtractionError(str(e)) from e
+        return []
 
-            text = soup.get_text(separator="\n", strip=True)
 
-            source_url = "Unknown"
-            for comment in soup.find_all(string=lambda text: isinstance(text, str) and "SOURCE_URL:" in text):
-                if "SOURCE_URL:" in comment:
-                    source_url = comment.split("SOURCE_URL:")[-1].strip()
-                    break
+def extract_text_from_html_string(html, content_hash=None, strict=False):
+    """Same as extract_text_from_html for a page that is still in memory."""
+    try:
+        content_hash = content_hash or extraction_cache.bytes_sha256(html.encode("utf-8"))
+        cached = extraction_cache.get("html", content_hash, EXTRACTOR_VERSION)
+        if cached is not None:
+            return [tuple(page) for page in cached]
 
-            return [(1, text, title.strip(), source_url)]
+        pages = _html_pages(html)
+        extraction_cache.put("html", content_hash, EXTRACTOR_VERSION, pages)
+        return pages
 
     except Exception as e:
-        print(f"[ERROR] Couldn't extract HTML text from {html_path}: {e}")
+        print(f"[ERROR] Couldn't extract HTML text from {len(html)} characters in memory: {e}")
+        if strict:
+            raise ExtractionError(str(e)) from e
         return []
+
+
+def _html_pages(html):
+    doc = Document(html)
+    simplified_html = doc.summary()
+    title = doc.title() or "Untitled"
+
+    # Remove unwanted elements
+    soup = BeautifulSoup(simplified_html, "html.parser")
+    for tag in soup(["script", "style", "head", "footer", "nav"]):
+        tag.decompose()
+
+    text = soup.get_text(separator="\n", strip=True)
+
+    source_url = "Unknown"
+    for comment in soup.find_all(string=lambda text: isinstance(text, str) and "SOURCE_URL:" in text):
+        if "SOURCE_URL:" in comment:
+            source_url = comment.split("SOURCE_URL:")[-1].strip()
+            break
+
+    return [(1, text, title.strip(), source_url)]
@@ -0,0 +1,38 @@
+import hashlib
+import config
+
+
+def doc_key(doc):
+    meta = doc.metadata or {}
+    digest = hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+    return meta.get("source"), meta.get("page"), digest
+
+
+def reciprocal_rank_fusion(ranked_lists, k=None, rrf_k=None, weights=None, with_scores=False):
+    """Fuse several ranked Document lists, deduplicating by source/page/content.
+
+    With with_scores=True, (doc, fused_score) pairs are returned instead of bare docs.
+    """
+    rrf_k = rrf_k or config.RRF_K
+    weights = weights or [1.0] * len(ranked_lists)
+    scores, docs = {}, {}
+    for ranked, weight in zip(ranked_lists, weights):
+        for rank, doc in enumerate(ranked):
+            key = doc_key(doc)
+            scores[key] = scores.get(key, 0.0) + weight / (rrf_k + rank + 1)
+            docs.setdefault(key, doc)
+
+    ranked_keys = sorted(scores, key=scores.get, reverse=True)
+    fused = [(docs[key], scores[key]) if with_scores else docs[key] for key in ranked_keys]
+    return fused[:k] if k else fused
+
+
+def min_max_normalize(scored):
+    """Rescale the scores of (item, score) pairs to [0, 1] so lists from different models are comparable."""
+    if not scored:
+        return []
+    scores = [score for _, score in scored]
+    low, high = min(scores), max(scores)
+    if high == low:
+        return [(item, 1.0) for item, _ in scored]
+    return [(item, (score - low) / (high - low)) for item, score in scored]
@@ -0,0 +1,154 @@
+import json
+import time
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import config
+
+
+# Process-wide timing spans and counters (stdlib only). Every stage of ingestion
+# and question answering records its duration in a histogram labelled by stage;
+# counters track skipped chunks, tokens and cache hits. The registry is exposed
+# in Prometheus text format on config.METRICS_PORT, and with config.JSON_LOGS
+# each span / event is also printed as one JSON line.
+
+PREFIX = "legal_gpt"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_server = None
+
+
+def _labels_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items() if value is not None))
+
+
+def inc(name, value=1, **labels):
+    """Add value to the counter name{labels}."""
+    key = (name, _labels_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(stage, seconds, **labels):
+    """Record a stage duration that was measured elsewhere (e.g. summed over a loop)."""
+    key = ("stage_seconds", _labels_key({"stage": stage, **labels}))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram["buckets"][i] += 1
+        histogram["sum"] += seconds
+        histogram["count"] += 1
+
+
+def log_event(event, **fields):
+    if config.JSON_LOGS:
+        print(json.dumps({"ts": round(time.time(), 3), "event": event, **fields}, ensure_ascii=False, default=str))
+
+
+@contextmanager
+def span(stage, **labels):
+    """Time the enclosed block as `stage`; fields added to the yielded dict go into the JSON log line."""
+    fields = {}
+    status = "ok"
+    started = time.perf_counter()
+    try:
+        yield fields
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        observe(stage, seconds, **labels)
+        if status == "error":
+            inc("stage_errors_total", stage=stage, **labels)
+        log_event("span", stage=stage, status=status, duration_ms=round(seconds * 1000, 2), **labels, **fields)
+
+
+def record_llm_usage(purpose, prompt="", completion="", usage=None):
+    """Count tokens of a chat call from its usage_metadata, estimating from the text when it is missing."""
+    usage = usage or {}
+    input_tokens, output_tokens = usage.get("input_tokens"), usage.get("output_tokens")
+    if input_tokens is None or output_tokens is None:
+        from context_builder import count_tokens
+        input_tokens, output_tokens = count_tokens(prompt or ""), count_tokens(completion or "")
+    inc("llm_tokens_total", input_tokens, purpose=purpose, kind="input")
+    inc("llm_tokens_total", output_tokens, purpose=purpose, kind="output")
+
+
+# === Prometheus exposition ===
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def render():
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: {**h, "buckets": list(h["buckets"])} for key, h in _histograms.items()}
+
+    lines = []
+    for name in sorted({name for name, _ in counters}):
+        metric = f"{PREFIX}_{name}"
+        lines.append(f"# TYPE {metric} counter")
+        for (counter_name, labels), value in sorted(counters.items()):
+            if counter_name == name:
+                lines.append(f"{metric}{_format_labels(labels)} {value}")
+
+    for name in sorted({name for name, _ in histograms}):
+        metric = f"{PREFIX}_{name}"
+        lines.append(f"# TYPE {metric} histogram")
+        for (histogram_name, labels), histogram in sorted(histograms.items()):
+            if histogram_name != name:
+                continue
+            for bound, count in zip(BUCKETS, histogram["buckets"]):
+                lines.append(f"{metric}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+            lines.append(f"{metric}_bucket{_format_labels(labels, [('le', '+Inf')])} {histogram['count']}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {histogram['sum']:.6f}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {histogram['count']}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(port=None):
+    """Serve /metrics from a daemon thread; safe to call on every Streamlit rerun."""
+    global _server
+    port = config.METRICS_PORT if port is None else port
+    with _lock:
+        if _server is not None or not port:
+            return _server
+        try:
+            _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+        except OSError as e:
+            print(f"[⚠️ METRICS] Could not listen on port {port}: {e}")
+            return None
+    threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"[📈] Prometheus metrics on http://0.0.0.0:{port}/metrics")
+    return _server
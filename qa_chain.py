@@ -0,0 +1,97 @@
+import time
+import utils
+import answer_cache
+import metrics
+import context_builder
+from langchain.prompts import PromptTemplate
+from clients import get_llm
+
+
+# Question answering core shared by the Streamlit app and the benchmarks:
+# answer-cache lookup, retrieval, context assembly and the (streaming) LLM call.
+
+
+def load_llm(temp=0.0):
+    return get_llm(temp)
+
+def setup_qa_chain(query, temp=0.0, k=10, retrieve=None, filters=None):
+    query_lang = utils.detect_language(query)
+    # Only plain questions share cached answers: filtered ones depend on the filter, and case
+    # advice (custom retrieve) must never be served from another, merely similar case
+    use_answer_cache = not filters and retrieve is None
+    cached = query_embedding = index_version = None
+    if use_answer_cache:
+        # Custom retrievers (whole case documents) embed their own segments; never the full text
+        index_version = utils.search_cache.get_index_version(utils.get_collection_name(query_lang))
+        query_embedding = utils.embed_query(query, query_lang)
+        cached = answer_cache.lookup(query_embedding, query_lang, index_version, temp)
+    if cached:
+        def cached_qa_chain(query, stream=False):
+            if stream:
+                return {**cached, "stream": iter([cached["result"]])}
+            return cached
+        return cached_qa_chain, cached["source_documents"]
+
+    if retrieve is None:
+        docs = utils.direct_qdrant_search(query, lang=query_lang, k=k, filters=filters)
+    else:
+        docs = retrieve(query, lang=query_lang, k=k)
+
+    if not docs:
+        print("[⚠️] No relevant documents retrieved. Check embeddings or query.")
+        return None, None
+
+    with metrics.span("context_build"):
+        context, docs = context_builder.build_context(docs)
+
+    llm = load_llm(temp)
+
+    prompt_template = """You are a legal assistant. Use the context below to answer the user's question.
+                        If the answer is not present, reply:
+                        "Sorry, the information you're asking for isn't available in the provided documents."
+
+                        Context:
+                        {context}
+
+                        Question:
+                        {question}
+
+                        Answer:"""
+
+    PROMPT = PromptTemplate(template=prompt_template, input_variables=["context", "question"])
+
+    def manual_qa_chain(query, stream=False):
+        prompt = PROMPT.format(context=context, question=query)
+        if not stream:
+            with metrics.span("llm", mode="invoke"):
+                result = llm.invoke(prompt)
+            metrics.record_llm_usage("answer", prompt, result.content, getattr(result, "usage_metadata", None))
+            response = {"result": result.content, "source_documents": docs}
+            if use_answer_cache:
+                answer_cache.store(query, query_embedding, query_lang, index_version, temp, response)
+            return response
+
+        # "result" is filled in (and cached) once the stream has been fully consumed
+        response = {"result": None, "source_documents": docs}
+
+        def token_stream():
+            parts, usage = [], None
+            started = time.perf_counter()
+            with metrics.span("llm", mode="stream") as fields:
+                for chunk in llm.stream(prompt):
+                    usage = getattr(chunk, "usage_metadata", None) or usage
+                    if chunk.content:
+                        if not parts:
+                            fields["ttft_ms"] = round((time.perf_counter() - started) * 1000, 2)
+                            metrics.observe("llm_first_token", time.perf_counter() - started)
+                        parts.append(chunk.content)
+                        yield chunk.content
+            response["result"] = "".join(parts)
+            metrics.record_llm_usage("answer", prompt, response["result"], usage)
+            if use_answer_cache:
+                answer_cache.store(query, query_embedding, query_lang, index_version, temp, response)
+
+        response["stream"] = token_stream()
+        return response
+
+    return manual_qa_chain, docs
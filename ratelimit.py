@@ -0,0 +1,65 @@
+import random
+import threading
+import time
+import config
+
+
+# Process-wide concurrency limits shared by every ingestion worker
+openai_slots = threading.BoundedSemaphore(config.OPENAI_MAX_CONCURRENCY)
+qdrant_slots = threading.BoundedSemaphore(config.QDRANT_MAX_CONCURRENCY)
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def _status_code(error):
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def _retry_after(error):
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after") or headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error):
+    status = _status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    # Connection resets / timeouts from httpx, requests and the OpenAI SDK
+    name = type(error).__name__
+    return any(word in name for word in ("Timeout", "Connection", "RateLimit"))
+
+
+def call_with_backoff(fn, *args, retries=None, base_delay=None, **kwargs):
+    """Call fn, retrying rate limits and transient errors with jittered exponential backoff.
+
+    A Retry-After header (sent by OpenAI on 429) takes precedence over the computed delay.
+    """
+    retries = config.RETRY_MAX_ATTEMPTS if retries is None else retries
+    base_delay = config.RETRY_BASE_DELAY if base_delay is None else base_delay
+
+    for attempt in range(retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == retries or not is_retryable(e):
+                raise
+            delay = _retry_after(e) or min(base_delay * 2 ** attempt, config.RETRY_MAX_DELAY)
+            delay += random.uniform(0, delay / 4)
+            print(f"[⏳ RETRY {attempt + 1}/{retries}] {type(e).__name__} ({_status_code(e) or 'n/a'}), sleeping {delay:.1f}s")
+            time.sleep(delay)
+
+
+def call_openai(fn, *args, **kwargs):
+    with openai_slots:
+        return call_with_backoff(fn, *args, **kwargs)
+
+
+def call_qdrant(fn, *args, **kwargs):
+    with qdrant_slots:
+        return call_with_backoff(fn, *args, **kwargs)
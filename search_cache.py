@@ -0,0 +1,209 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+import config
+import metrics
+
+
+INDEX_VERSION_PATH = "index_version.json"
+
+_lock = threading.RLock()
+_version_cache = {"mtime": None, "versions": {}}
+_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "embedding_hits": 0, "embedding_misses": 0}
+_METRIC_LABELS = {
+    "memory_hits": ("search", "memory_hit"),
+    "disk_hits": ("search", "disk_hit"),
+    "misses": ("search", "miss"),
+    "embedding_hits": ("query_embedding", "hit"),
+    "embedding_misses": ("query_embedding", "miss"),
+}
+
+
+class LRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_results = LRUCache(config.SEARCH_CACHE_SIZE)
+_embeddings = LRUCache(config.EMBEDDING_CACHE_SIZE)
+
+
+# === Index versions ===
+# Bumped whenever a collection's points change so stale cache keys are never read again.
+
+def _load_versions():
+    try:
+        mtime = os.path.getmtime(INDEX_VERSION_PATH)
+    except OSError:
+        return {}
+    if _version_cache["mtime"] != mtime:
+        try:
+            with open(INDEX_VERSION_PATH, "r") as f:
+                _version_cache["versions"] = json.load(f)
+            _version_cache["mtime"] = mtime
+        except Exception as e:
+            print(f"[⚠️ INDEX VERSION LOAD ERROR] {e}")
+    return _version_cache["versions"]
+
+
+def get_index_version(collection):
+    with _lock:
+        return _load_versions().get(collection, 0)
+
+
+def bump_index_version(*collections):
+    with _lock:
+        versions = dict(_load_versions())
+        for collection in collections:
+            versions[collection] = versions.get(collection, 0) + 1
+        tmp_path = INDEX_VERSION_PATH + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(versions, f)
+        os.replace(tmp_path, INDEX_VERSION_PATH)
+        _version_cache.update(mtime=os.path.getmtime(INDEX_VERSION_PATH), versions=versions)
+    print(f"[🔢 INDEX VERSION] {', '.join(f'{c}={versions[c]}' for c in collections)}")
+
+
+# === Keys ===
+
+def normalize_query(query):
+    query = unicodedata.normalize("NFKC", query).lower()
+    return re.sub(r"\s+", " ", query).strip()
+
+
+def _key(*parts):
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+# === Optional on-disk level (SQLite, shared across processes and restarts) ===
+
+_disk = threading.local()
+
+
+def _disk_conn():
+    if not config.SEARCH_CACHE_DIR:
+        return None
+    conn = getattr(_disk, "conn", None)
+    if conn is None:
+        os.makedirs(config.SEARCH_CACHE_DIR, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(config.SEARCH_CACHE_DIR, "search_cache.sqlite3"), timeout=5)
+        conn.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT, created_at REAL)")
+        _disk.conn = conn
+    return conn
+
+
+def _disk_get(key):
+    try:
+        conn = _disk_conn()
+        if conn is None:
+            return None
+        row = conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+    except Exception as e:
+        print(f"[⚠️ SEARCH CACHE DISK ERROR] {e}")
+        return None
+
+
+def _disk_put(key, value):
+    try:
+        conn = _disk_conn()
+        if conn is None:
+            return
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), time.time())
+            )
+            conn.execute(
+                "DELETE FROM results WHERE key NOT IN (SELECT key FROM results ORDER BY created_at DESC LIMIT ?)",
+                (config.SEARCH_CACHE_DISK_MAX_ENTRIES,)
+            )
+    except Exception as e:
+        print(f"[⚠️ SEARCH CACHE DISK ERROR] {e}")
+
+
+# === Public API ===
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+    cache, result = _METRIC_LABELS[name]
+    metrics.inc("cache_requests_total", cache=cache, result=result)
+
+
+def get_results(query, lang, k, version, variant="dense"):
+    """Return cached search payloads or None."""
+    key = _key(normalize_query(query), lang, k, version, variant)
+    payloads = _results.get(key)
+    if payloads is not None:
+        _count("memory_hits")
+        return payloads
+
+    payloads = _disk_get(key)
+    if payloads is not None:
+        _count("disk_hits")
+        _results.put(key, payloads)
+        return payloads
+
+    _count("misses")
+    return None
+
+
+def put_results(query, lang, k, version, payloads, variant="dense"):
+    key = _key(normalize_query(query), lang, k, version, variant)
+    _results.put(key, payloads)
+    _disk_put(key, payloads)
+
+
+def get_embedding(query, lang):
+    embedding = _embeddings.get(_key(normalize_query(query), lang))
+    _count("embedding_hits" if embedding is not None else "embedding_misses")
+    return embedding
+
+
+def put_embedding(query, lang, embedding):
+    _embeddings.put(_key(normalize_query(query), lang), embedding)
+
+
+def stats():
+    lookups = _stats["memory_hits"] + _stats["disk_hits"] + _stats["misses"]
+    hits = _stats["memory_hits"] + _stats["disk_hits"]
+    return {
+        **_stats,
+        "hit_rate": hits / lookups if lookups else 0.0,
+        "memory_entries": len(_results),
+    }
+
+
+def clear():
+    _results.clear()
+    _embeddings.clear()
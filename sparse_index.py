@@ -0,0 +1,177 @@
+import os
+import re
+import gzip
+import json
+import math
+import threading
+import unicodedata
+from collections import Counter
+import config
+
+
+# Local BM25 inverted index per collection, kept next to the dense Qdrant
+# collections so exact tokens ("Article 12", "(13) of 2022", "المادة 5")
+# can be matched lexically. Only the per-document term counts and a small
+# payload are persisted; postings are rebuilt in memory on load.
+
+ARABIC_DIACRITICS = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+ARABIC_LETTER_MAP = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ى": "ي", "ة": "ه", "ؤ": "و", "ئ": "ي",
+    "٠": "0", "١": "1", "٢": "2", "٣": "3", "٤": "4",
+    "٥": "5", "٦": "6", "٧": "7", "٨": "8", "٩": "9",
+})
+ARABIC_PREFIXES = ("وال", "بال", "كال", "فال", "لل", "ال")
+TOKEN_PATTERN = re.compile(r"\w+")
+PAYLOAD_KEYS = ("text", "source", "page", "lang")
+
+
+def tokenize(text):
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = ARABIC_DIACRITICS.sub("", text).translate(ARABIC_LETTER_MAP)
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text):
+        # Light stemming: strip the definite article so "المادة" matches "مادة"
+        for prefix in ARABIC_PREFIXES:
+            if token.startswith(prefix) and len(token) - len(prefix) >= 2:
+                token = token[len(prefix):]
+                break
+        tokens.append(token)
+    return tokens
+
+
+class SparseIndex:
+    def __init__(self, path):
+        self.path = path
+        self.docs = {}
+        self.postings = {}
+        self.total_length = 0
+        self.mtime = None
+        self.dirty = False
+        self._lock = threading.RLock()
+
+    # === Persistence ===
+
+    def load(self):
+        with self._lock:
+            self.docs, self.postings, self.total_length = {}, {}, 0
+            if os.path.exists(self.path):
+                try:
+                    with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                        docs = json.load(f)
+                    for point_id, doc in docs.items():
+                        self._insert(point_id, doc)
+                    self.mtime = os.path.getmtime(self.path)
+                except Exception as e:
+                    print(f"[⚠️ SPARSE INDEX LOAD ERROR] {self.path}: {e}")
+            self.dirty = False
+
+    def reload_if_changed(self):
+        with self._lock:
+            if self.dirty or not os.path.exists(self.path):
+                return
+            if os.path.getmtime(self.path) != self.mtime:
+                self.load()
+
+    def save(self):
+        with self._lock:
+            if not self.dirty:
+                return
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(self.docs, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self.mtime = os.path.getmtime(self.path)
+            self.dirty = False
+
+    # === Updates ===
+
+    def _insert(self, point_id, doc):
+        self.docs[point_id] = doc
+        self.total_length += doc["len"]
+        for term, tf in doc["tf"].items():
+            self.postings.setdefault(term, {})[point_id] = tf
+
+    def add(self, point_id, text, payload):
+        tokens = tokenize(text)
+        doc = {
+            "tf": dict(Counter(tokens)),
+            "len": len(tokens),
+            "payload": {key: payload[key] for key in PAYLOAD_KEYS if key in payload},
+        }
+        with self._lock:
+            self._remove(point_id)
+            self._insert(point_id, doc)
+            self.dirty = True
+
+    def _remove(self, point_id):
+        doc = self.docs.pop(point_id, None)
+        if doc is None:
+            return
+        self.total_length -= doc["len"]
+        for term in doc["tf"]:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(point_id, None)
+                if not postings:
+                    del self.postings[term]
+
+    def remove(self, point_ids):
+        with self._lock:
+            for point_id in point_ids:
+                self._remove(point_id)
+            self.dirty = True
+
+    def remove_source(self, source):
+        with self._lock:
+            self.remove([pid for pid, doc in self.docs.items() if doc["payload"].get("source") == source])
+
+    # === Search ===
+
+    def search(self, query, k=10, accept=None):
+        """Return up to k (point_id, bm25_score, payload) tuples, best first.
+
+        accept, when given, is called with each candidate payload and filters it out when falsy.
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self.docs)
+            if not n_docs or not terms:
+                return []
+            avg_length = self.total_length / n_docs
+            k1, b = config.BM25_K1, config.BM25_B
+            scores = Counter()
+            for term in terms:
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for point_id, tf in postings.items():
+                    if accept is not None and not accept(self.docs[point_id]["payload"]):
+                        continue
+                    length = self.docs[point_id]["len"]
+                    scores[point_id] += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_length))
+            return [(pid, score, self.docs[pid]["payload"]) for pid, score in scores.most_common(k)]
+
+
+_indexes = {}
+_registry_lock = threading.Lock()
+
+
+def get_index(collection):
+    with _registry_lock:
+        index = _indexes.get(collection)
+        if index is None:
+            index = SparseIndex(os.path.join(config.SPARSE_INDEX_DIR, f"{collection}.json.gz"))
+            index.load()
+            _indexes[collection] = index
+    index.reload_if_changed()
+    return index
+
+
+def save_all():
+    with _registry_lock:
+        indexes = list(_indexes.values())
+    for index in indexes:
+        index.save()
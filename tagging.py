@@ -0,0 +1,95 @@
+import json
+import re
+import config
+from ratelimit import call_openai
+import metrics
+
+
+SINGLE_TAG_PROMPT = "Assign 2-4 short relevant legal topic tags (comma-separated) for the following law excerpt:\n\n{excerpt}"
+
+BATCH_TAG_PROMPT = """Assign 2-4 short relevant legal topic tags to each of the law excerpts below.
+Return ONLY a JSON array with exactly one object per excerpt, in any order, shaped like:
+[{{"id": 0, "tags": ["tag one", "tag two"]}}]
+
+Excerpts (JSON):
+{excerpts}"""
+
+
+def tag_chunk(llm, chunk):
+    try:
+        prompt = SINGLE_TAG_PROMPT.format(excerpt=chunk[:1000])
+        message = call_openai(llm.invoke, prompt)
+        metrics.record_llm_usage("tagging", prompt, message.content, getattr(message, "usage_metadata", None))
+        tags_response = message.content
+        return [t.strip() for t in tags_response.split(",") if t.strip()]
+    except Exception as e:
+        print(f"[TAG ERROR] {e}")
+        return []
+
+
+def _clean_tags(tags):
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    if not isinstance(tags, list):
+        return None
+    cleaned = [str(t).strip() for t in tags if str(t).strip()]
+    return cleaned[:4] or None
+
+
+def parse_batch_response(content, expected):
+    """Map excerpt id -> tags from a JSON array reply; unusable items are simply missing."""
+    content = re.sub(r"^```(?:json)?|```$", "", content.strip(), flags=re.MULTILINE).strip()
+    start, end = content.find("["), content.rfind("]")
+    if start == -1 or end <= start:
+        return {}
+    try:
+        items = json.loads(content[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+
+    parsed = {}
+    for position, item in enumerate(items if isinstance(items, list) else []):
+        if isinstance(item, dict):
+            item_id, tags = item.get("id", position), _clean_tags(item.get("tags"))
+        else:
+            item_id, tags = position, _clean_tags(item)
+        try:
+            # Models sometimes echo ids as strings ("0")
+            item_id = int(item_id)
+        except (TypeError, ValueError):
+            continue
+        if 0 <= item_id < expected and tags:
+            parsed[item_id] = tags
+    return parsed
+
+
+def tag_chunks(llm, texts, batch_size=None):
+    """Tag many chunks with one chat completion per batch, retrying missing items one by one."""
+    batch_size = batch_size or config.TAG_BATCH_SIZE
+    results = [[] for _ in texts]
+
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start:start + batch_size]
+        excerpts = json.dumps(
+            [{"id": i, "text": text[:1000]} for i, text in enumerate(batch)],
+            ensure_ascii=False
+        )
+        try:
+            prompt = BATCH_TAG_PROMPT.format(excerpts=excerpts)
+            message = call_openai(llm.invoke, prompt)
+            metrics.record_llm_usage("tagging", prompt, message.content, getattr(message, "usage_metadata", None))
+            parsed = parse_batch_response(message.content, len(batch))
+        except Exception as e:
+            print(f"[TAG ERROR] Batch starting at {start}: {e}")
+            parsed = {}
+
+        missing = [i for i in range(len(batch)) if i not in parsed]
+        if missing:
+            print(f"[TAG FALLBACK] {len(missing)}/{len(batch)} excerpt(s) tagged individually")
+        for i in missing:
+            parsed[i] = tag_chunk(llm, batch[i])
+
+        for i in range(len(batch)):
+            results[start + i] = parsed[i]
+
+    return results
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from langchain.docstore.document import Document
+import answer_cache
+import config
+
+
+@pytest.fixture(autouse=True)
+def memory_only_cache(monkeypatch):
+    monkeypatch.setattr(config, "SEARCH_CACHE_DIR", "")
+    monkeypatch.setattr(config, "ANSWER_CACHE_ENABLED", True)
+    monkeypatch.setattr(config, "ANSWER_CACHE_THRESHOLD", 0.95)
+    monkeypatch.setattr(config, "ANSWER_CACHE_THRESHOLD_AR", 0.99)
+    monkeypatch.setattr(answer_cache, "_entries", None)
+
+
+def embedding(angle):
+    # Unit vectors whose cosine similarity to embedding(0) is cos(angle)
+    return [float(np.cos(angle)), float(np.sin(angle))] + [0.0] * 6
+
+
+RESPONSE = {"result": "Article 5 applies.", "source_documents": [Document(page_content="text", metadata={"source": "a.pdf"})]}
+
+
+def store(lang):
+    answer_cache.store("question", embedding(0), lang, 1, 0.0, RESPONSE)
+
+
+def test_close_english_question_reuses_the_answer():
+    store("en")
+    hit = answer_cache.lookup(embedding(np.arccos(0.97)), "en", 1, 0.0)
+    assert hit["result"] == "Article 5 applies."
+    assert hit["source_documents"][0].metadata["source"] == "a.pdf"
+
+
+def test_arabic_uses_its_own_stricter_threshold():
+    store("ar")
+    assert answer_cache.lookup(embedding(np.arccos(0.97)), "ar", 1, 0.0) is None
+    assert answer_cache.lookup(embedding(np.arccos(0.995)), "ar", 1, 0.0) is not None
+
+
+def test_threshold_above_one_disables_the_cache_for_arabic(monkeypatch):
+    monkeypatch.setattr(config, "ANSWER_CACHE_THRESHOLD_AR", 1.01)
+    store("ar")
+    assert answer_cache.lookup(embedding(0), "ar", 1, 0.0) is None
+    assert answer_cache.stats()["entries"] == 0
+
+
+def test_index_version_and_language_must_match():
+    store("en")
+    assert answer_cache.lookup(embedding(0), "en", 2, 0.0) is None
+    assert answer_cache.lookup(embedding(0), "ar", 1, 0.0) is None
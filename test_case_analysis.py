@@ -0,0 +1,34 @@
+import re
+from case_analysis import split_case_into_issues
+
+
+def _text(s):
+    return re.sub(r"\s", "", s)
+
+
+def _case(paragraphs):
+    return "\n\n".join(
+        f"{i + 1}. The employee claims issue {i} about " + "unpaid wages and notice " * (i % 7 + 1)
+        for i in range(paragraphs)
+    )
+
+
+def test_long_case_fits_max_segments_without_dropping_text():
+    case = _case(60)
+    segments = split_case_into_issues(case, max_chars=200, max_segments=5)
+    assert len(segments) <= 5
+    assert "".join(_text(s) for s in segments) == _text(case)
+
+
+def test_short_fragments_are_folded_into_a_neighbour():
+    case = "1. ok\n\n2. The tenant was evicted without the notice the lease requires.\n\n3. rent"
+    segments = split_case_into_issues(case, max_chars=60, max_segments=10)
+    assert all(len(s) >= 20 for s in segments)
+    assert "".join(_text(s) for s in segments) == _text(case)
+
+
+def test_oversized_paragraph_is_split_and_kept_whole():
+    case = "The contract was terminated. " * 40
+    segments = split_case_into_issues(case, max_chars=100, max_segments=3)
+    assert len(segments) == 3
+    assert "".join(_text(s) for s in segments) == _text(case)
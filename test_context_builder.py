@@ -0,0 +1,53 @@
+import pytest
+from langchain.docstore.document import Document
+import context_builder
+from context_builder import build_context
+
+ARTICLE = ("Article 12. The employer shall grant the worker an annual leave of thirty days with full pay "
+           "for every year of service, and the leave may be split with the consent of both parties.")
+
+
+@pytest.fixture(autouse=True)
+def approximate_tokens(monkeypatch):
+    # Keep token counting offline and deterministic
+    monkeypatch.setattr(context_builder, "_encoding", context_builder._ApproxEncoding())
+
+
+def doc(text, source="law.pdf", page=1):
+    return Document(page_content=text, metadata={"source": source, "page": page})
+
+
+def test_overlapping_chunks_of_the_same_page_are_merged():
+    first, second = ARTICLE[:120], ARTICLE[60:]
+    context, used = build_context([doc(first), doc(second)])
+    assert context == ARTICLE
+    assert len(used) == 1
+
+
+def test_contained_chunk_is_absorbed():
+    _, used = build_context([doc(ARTICLE[40:100]), doc(ARTICLE)])
+    assert [d.page_content for d in used] == [ARTICLE]
+
+
+def test_same_text_on_other_pages_is_not_merged():
+    _, used = build_context([doc(ARTICLE[:120], page=1), doc(ARTICLE[60:], page=2)])
+    assert len(used) == 2
+
+
+def test_near_duplicates_are_dropped_only_within_a_page():
+    original = ARTICLE + " " + ARTICLE.replace("Article 12", "Article 13").replace("annual", "sick")
+    amended = original.replace("thirty", "forty-five", 1)
+    _, same_page = build_context([doc(original), doc(amended)])
+    assert [d.page_content for d in same_page] == [original]
+    # An amendment in another document differs by one number and must survive
+    _, other_source = build_context([doc(original), doc(amended, source="amendment.pdf")])
+    assert [d.metadata["source"] for d in other_source] == ["law.pdf", "amendment.pdf"]
+
+
+def test_token_budget_truncates_the_last_chunk():
+    docs = [doc(ARTICLE, page=page) for page in range(1, 4)]
+    budget = context_builder.count_tokens(ARTICLE) + 60
+    context, used = build_context(docs, token_budget=budget)
+    assert context_builder.count_tokens(context) <= budget
+    assert len(used) == 2
+    assert ARTICLE.startswith(used[1].page_content)
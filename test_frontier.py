@@ -0,0 +1,64 @@
+import pytest
+from crawler.frontier import CrawlFrontier
+
+SITE = "https://example.gov.ae/en/home"
+
+
+@pytest.fixture
+def frontier(tmp_path):
+    frontier = CrawlFrontier(str(tmp_path / "frontier.sqlite3"))
+    yield frontier
+    frontier.close()
+
+
+def test_new_run_starts_from_the_start_url(frontier):
+    pending, known = frontier.begin(SITE, SITE)
+    assert pending == [(SITE, 0)]
+    assert known == {SITE}
+    assert frontier.has_unfinished_run(SITE)
+
+
+def test_interrupted_run_resumes_only_pending_urls(frontier):
+    frontier.begin(SITE, SITE)
+    frontier.add(SITE, SITE + "/a", 1)
+    frontier.add(SITE, SITE + "/b", 1)
+    frontier.mark_done(SITE, SITE)
+    frontier.mark_error(SITE, SITE + "/a", "HTTP 500")
+
+    pending, known = frontier.begin(SITE, SITE)
+    assert pending == [(SITE + "/b", 1)]
+    assert known == {SITE, SITE + "/a", SITE + "/b"}
+
+
+def test_finished_run_requeues_everything_and_keeps_validators(frontier):
+    frontier.begin(SITE, SITE)
+    frontier.add(SITE, SITE + "/doc.pdf", 1)
+    frontier.mark_done(SITE, SITE, etag='"v1"', content_hash="h1", blob_path="crawled/html/home.html", changed=True)
+    frontier.mark_done(SITE, SITE + "/doc.pdf", last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    frontier.finish(SITE)
+    assert not frontier.has_unfinished_run(SITE)
+
+    pending, _ = frontier.begin(SITE, SITE)
+    assert pending == [(SITE, 0), (SITE + "/doc.pdf", 1)]
+    page = frontier.get(SITE, SITE)
+    assert (page["status"], page["etag"], page["content_hash"]) == ("pending", '"v1"', "h1")
+
+
+def test_mark_done_only_overwrites_given_fields(frontier):
+    frontier.begin(SITE, SITE)
+    frontier.mark_done(SITE, SITE, etag='"v1"', content_hash="h1", changed=True)
+    changed_at = frontier.get(SITE, SITE)["changed_at"]
+    # A 304 carries no validators or hash: the stored ones must survive
+    frontier.mark_done(SITE, SITE)
+    page = frontier.get(SITE, SITE)
+    assert (page["etag"], page["content_hash"], page["changed_at"]) == ('"v1"', "h1", changed_at)
+
+
+def test_add_keeps_the_shallowest_depth_and_sites_are_separate(frontier):
+    frontier.begin(SITE, SITE)
+    frontier.add(SITE, SITE + "/a", 3)
+    frontier.add(SITE, SITE + "/a", 1)
+    frontier.add("https://other.ae", SITE + "/a", 2)
+    assert frontier.get(SITE, SITE + "/a")["depth"] == 1
+    assert frontier.get("https://other.ae", SITE + "/a")["depth"] == 2
+    assert frontier.stats(SITE) == {"pending": 2}
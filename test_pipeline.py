@@ -19,7 +19,7 @@
 #         print(extract_entities(doc.page_content))
 
 from qdrant_client.http.models import VectorParams, Distance
-from qdrant_client import QdrantClient
+from clients import get_qdrant_client
 import config
 
 import streamlit as st
@@ -36,12 +36,7 @@ from pathlib import Path
 
 def setup_qdrant_collections():
     print("function called setup_qdrant_collections")
-    client = QdrantClient(
-        host=config.QDRANT_HOST,
-        port=config.QDRANT_PORT,
-        https=config.QDRANT_USE_HTTPS,
-        api_key=config.QDRANT_API_KEY,
-    )
+    client = get_qdrant_client()
 
     collections = [
         # ("uae_law_openai", 1536),
@@ -61,20 +56,14 @@ def setup_qdrant_collections():
 
 def delete_qdrant_collections():
     print("function called delete_qdrant_collections")
-    client = QdrantClient(
-        host=config.QDRANT_HOST,
-        port=config.QDRANT_PORT,
-        https=config.QDRANT_USE_HTTPS,
-        api_key=config.QDRANT_API_KEY,
-    )
+    client = get_qdrant_client()
     client.delete_collection(collection_name="uae_law_openai")
 
 
 def test_crawler():
     from crawler.scraper import crawl_all_sites
-    new_blobs = crawl_all_sites(force=False)
-    for blob in new_blobs:
-        utils.create_embeddings(force=False, specific_file=blob)
+    with utils.StreamingIngestor() as ingestor:
+        crawl_all_sites(force=False, ingestor=ingestor)
     print("[✅] Website crawled finished successfully")
      
 
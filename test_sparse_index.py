@@ -0,0 +1,60 @@
+from sparse_index import SparseIndex, tokenize
+
+
+def make_index(tmp_path):
+    index = SparseIndex(str(tmp_path / "index.json.gz"))
+    index.add("a", "Article 12 termination of the employment contract", {"source": "labour.pdf", "page": 3})
+    index.add("b", "Article 13 annual leave for domestic workers", {"source": "domestic.pdf", "page": 1})
+    index.add("c", "المادة 5 من المرسوم بقانون", {"source": "decree.pdf", "page": 2, "lang": "ar"})
+    return index
+
+
+def test_tokenize_normalizes_arabic():
+    # Definite article, hamza forms, diacritics and Arabic-Indic digits
+    assert tokenize("المادة") == tokenize("مادة")
+    assert tokenize("أحكام") == tokenize("احكام")
+    assert tokenize("مَادَّة") == tokenize("مادة")
+    assert tokenize("المادة ٥") == ["ماده", "5"]
+
+
+def test_tokenize_keeps_numbers_and_lowercases():
+    assert tokenize("Article 12 (13) of 2022") == ["article", "12", "13", "of", "2022"]
+
+
+def test_search_ranks_exact_tokens_first(tmp_path):
+    index = make_index(tmp_path)
+    results = index.search("article 12", k=3)
+    assert results[0][0] == "a"
+    assert results[0][1] > results[1][1]
+    assert index.search("مادة 5", k=1)[0][0] == "c"
+
+
+def test_search_accept_filters_payloads(tmp_path):
+    index = make_index(tmp_path)
+    results = index.search("article", k=5, accept=lambda payload: payload["source"] == "domestic.pdf")
+    assert [pid for pid, _, _ in results] == ["b"]
+
+
+def test_search_without_matching_terms_is_empty(tmp_path):
+    index = make_index(tmp_path)
+    assert index.search("nonexistent") == []
+    assert index.search("") == []
+
+
+def test_readd_and_remove_source_keep_statistics_consistent(tmp_path):
+    index = make_index(tmp_path)
+    index.add("a", "completely different text", {"source": "labour.pdf", "page": 3})
+    assert index.search("termination") == []
+    index.remove_source("labour.pdf")
+    assert set(index.docs) == {"b", "c"}
+    assert index.total_length == sum(doc["len"] for doc in index.docs.values())
+    assert "different" not in index.postings
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = make_index(tmp_path)
+    index.save()
+    reloaded = SparseIndex(index.path)
+    reloaded.load()
+    assert reloaded.search("article 12", k=1) == index.search("article 12", k=1)
+    assert reloaded.docs["c"]["payload"] == {"source": "decree.pdf", "page": 2, "lang": "ar"}
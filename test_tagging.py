@@ -0,0 +1,39 @@
+from tagging import parse_batch_response, tag_chunks
+
+
+def test_parse_batch_response_reads_json_array():
+    content = '[{"id": 1, "tags": ["leave", "domestic workers"]}, {"id": 0, "tags": "labour, contracts"}]'
+    assert parse_batch_response(content, 2) == {0: ["labour", "contracts"], 1: ["leave", "domestic workers"]}
+
+
+def test_parse_batch_response_tolerates_fences_strings_and_bare_lists():
+    content = 'Here you go:\n```json\n[{"id": "0", "tags": ["a"]}, ["b", "c"]]\n```'
+    assert parse_batch_response(content, 2) == {0: ["a"], 1: ["b", "c"]}
+
+
+def test_parse_batch_response_drops_unusable_items():
+    content = '[{"id": 5, "tags": ["x"]}, {"id": "one", "tags": ["y"]}, {"id": 1, "tags": []}, {"id": 0, "tags": ["1","2","3","4","5"]}]'
+    assert parse_batch_response(content, 2) == {0: ["1", "2", "3", "4"]}
+    assert parse_batch_response("not json at all", 3) == {}
+    assert parse_batch_response("[{broken", 3) == {}
+
+
+class _Message:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeLLM:
+    def __init__(self, batch_reply):
+        self.batch_reply = batch_reply
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return _Message(self.batch_reply if "Excerpts (JSON):" in prompt else "single, tag")
+
+
+def test_tag_chunks_falls_back_per_item_for_missing_ids():
+    llm = FakeLLM('[{"id": 0, "tags": ["first"]}]')
+    assert tag_chunks(llm, ["one", "two"], batch_size=10) == [["first"], ["single", "tag"]]
+    assert len(llm.prompts) == 2
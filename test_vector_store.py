@@ -0,0 +1,106 @@
+import numpy as np
+from qdrant_client.models import PointStruct
+from vector_store import LocalBackend, matches_filters
+
+COLLECTION = "uae_law_arabert"  # 768 dimensions
+
+
+def vector(*hot):
+    v = np.zeros(768, dtype=np.float32)
+    for i in hot:
+        v[i] = 1.0
+    return v.tolist()
+
+
+def point(point_id, hot, **payload):
+    return PointStruct(id=point_id, vector=vector(*hot), payload={"text": point_id, **payload})
+
+
+def make_backend(tmp_path):
+    backend = LocalBackend(str(tmp_path))
+    backend.upsert(COLLECTION, [
+        point("00000000-0000-0000-0000-000000000001", [0], source="a.pdf", page=1, tags=["labour"]),
+        point("00000000-0000-0000-0000-000000000002", [0, 1], source="a.pdf", page=5, tags=["insurance"]),
+        point("00000000-0000-0000-0000-000000000003", [2], source="b.pdf", page=2, tags=["labour", "leave"]),
+    ])
+    return backend
+
+
+def test_matches_filters():
+    payload = {"source": "a.pdf", "page": 4, "tags": ["labour", "leave"]}
+    assert matches_filters(payload, None)
+    assert matches_filters(payload, {"source": "a.pdf", "tags": "leave"})
+    assert matches_filters(payload, {"tags": ["insurance", "labour"]})
+    assert matches_filters(payload, {"page": {"gte": 3, "lte": 4}})
+    assert matches_filters(payload, {"source": "", "tags": []})
+    assert not matches_filters(payload, {"source": "b.pdf"})
+    assert not matches_filters(payload, {"page": {"gt": 4}})
+    assert not matches_filters(payload, {"lang": "en"})
+
+
+def test_search_orders_by_cosine_similarity(tmp_path):
+    backend = make_backend(tmp_path)
+    results = backend.search(COLLECTION, vector(0), k=3)
+    assert [payload["page"] for payload, _ in results] == [1, 5, 2]
+    assert results[0][1] == np.float32(1.0)
+    assert results[1][1] < results[0][1]
+
+
+def test_search_applies_filters(tmp_path):
+    backend = make_backend(tmp_path)
+    assert [p["source"] for p, _ in backend.search(COLLECTION, vector(0), 3, {"tags": "labour"})] == ["a.pdf", "b.pdf"]
+    assert [p["page"] for p, _ in backend.search(COLLECTION, vector(0), 3, {"page": {"gte": 2}})] == [5, 2]
+    assert backend.search(COLLECTION, vector(0), 3, {"source": "missing.pdf"}) == []
+
+
+def test_upsert_replaces_and_delete_hides_points(tmp_path):
+    backend = make_backend(tmp_path)
+    backend.upsert(COLLECTION, [point("00000000-0000-0000-0000-000000000001", [2], source="a.pdf", page=9)])
+    assert backend.count(COLLECTION) == 3
+    assert sorted(p["page"] for p, _ in backend.search(COLLECTION, vector(2), 2)) == [2, 9]
+    assert 1 not in [p["page"] for p, _ in backend.search(COLLECTION, vector(0), 3)]
+    backend.delete_by_filter(COLLECTION, {"source": "a.pdf"})
+    assert backend.count(COLLECTION) == 1
+    assert [p["source"] for p, _ in backend.search(COLLECTION, vector(0, 1, 2), 5)] == ["b.pdf"]
+
+
+def test_scroll_pages_and_set_payload(tmp_path):
+    backend = make_backend(tmp_path)
+    first, offset = backend.scroll(COLLECTION, limit=2, with_payload=["source"])
+    rest, end = backend.scroll(COLLECTION, limit=2, offset=offset)
+    assert len(first) == 2 and first[0].payload == {"source": "a.pdf"}
+    assert len(rest) == 1 and end is None
+    backend.set_payload(COLLECTION, [(rest[0].id, {"tags_pending": False})])
+    records, _ = backend.scroll(COLLECTION, filters={"tags_pending": False})
+    assert [r.id for r in records] == [rest[0].id]
+
+
+def test_scroll_cursor_survives_compaction_between_pages(tmp_path):
+    backend = LocalBackend(str(tmp_path))
+    ids = [f"00000000-0000-0000-0000-{i:012d}" for i in range(12)]
+    backend.upsert(COLLECTION, [point(point_id, [0], tags_pending=True) for point_id in ids])
+    backend.delete_ids(COLLECTION, ids[:8:2])
+
+    seen, offset = [], None
+    while True:
+        page, offset = backend.scroll(COLLECTION, filters={"tags_pending": True}, limit=2, offset=offset)
+        backend.set_payload(COLLECTION, [(record.id, {"tags_pending": False}) for record in page])
+        backend.flush()
+        seen += [record.id for record in page]
+        if offset is None:
+            break
+    assert seen == [point_id for point_id in ids if point_id not in ids[:8:2]]
+    assert backend.scroll(COLLECTION, filters={"tags_pending": True})[0] == []
+
+
+def test_flush_persists_and_compacts(tmp_path):
+    backend = make_backend(tmp_path)
+    backend.delete_ids(COLLECTION, ["00000000-0000-0000-0000-000000000002"])
+    backend.flush()
+
+    reopened = LocalBackend(str(tmp_path))
+    assert reopened.exists()
+    assert reopened.count(COLLECTION) == 2
+    results = reopened.search(COLLECTION, vector(0), 5)
+    assert [p["page"] for p, _ in results] == [1, 2]
+    assert np.load(tmp_path / COLLECTION / "vectors.npy").shape == (2, 768)
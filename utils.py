@@ -1,25 +1,24 @@
 import os
+import sys
 import json
 import re
 import fitz  # PyMuPDF
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
 from langchain.docstore.document import Document
 
 from langchain_qdrant import QdrantVectorStore
 from langchain_core.vectorstores import VectorStore
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams
 
-from langchain_openai import ChatOpenAI
 from azure_blob import upload_file, download_file, delete_file, list_files
 import config
+from clients import get_qdrant_client, get_embeddings, get_llm
 from fpdf import FPDF
 
 from pdf2image import convert_from_path
 import pytesseract
 from PIL import Image
-from extractors import extract_text, extract_text_from_html
+from extractors import extract_text, extract_text_from_html, extract_text_from_html_string, ExtractionError
+from extraction_cache import content_sha256
 from bs4 import BeautifulSoup
 
 from langdetect import detect, DetectorFactory
@@ -29,37 +28,48 @@ from PyPDF2 import PdfReader
 from PIL import Image
 
 from openai_embedder import get_openai_embedding
-from arabic_embedder import get_arabic_embedding
+from arabic_embedder import get_arabic_embedding, get_arabic_embeddings
 
 from qdrant_client.models import PointStruct
+from vector_store import get_vector_store, matches_filters, COLLECTIONS
+from tagging import tag_chunks
+import search_cache
+import sparse_index
+from fusion import reciprocal_rank_fusion, min_max_normalize, doc_key
+import answer_cache
+import metrics
+from ratelimit import call_openai
 import uuid
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 
 EMBED_RECORD_PATH = "embedded_files.json"
+CHUNK_MANIFEST_PATH = "chunk_manifest.json"
+POINT_ID_NAMESPACE = uuid.UUID("5b0c1f5e-4a8e-4c62-9d1b-6c2f0e7a9a31")
 
 TEMP_DIR = "temp_pdfs"
 os.makedirs(TEMP_DIR, exist_ok=True)
 
 QDRANT_COLLECTION_NAME = "uae_law"
+# Blob folders that feed the index (case-files/ are analysed separately)
+INDEXED_PREFIXES = ("legal-files/", "crawled/pdfs/", "crawled/html/")
+
+_manifest_lock = threading.Lock()
+_backfill_lock = threading.Lock()
+_sparse_checked = set()
+_sparse_checked_lock = threading.Lock()
+_backfill_requested = threading.Event()
+_arabert_lock = threading.Lock()
+_search_pool = ThreadPoolExecutor(max_workers=config.SEARCH_POOL_WORKERS)
 DetectorFactory.seed = 0
 
 
 def get_qdrant_vectorstore(embeddings, collection_name) -> VectorStore:
-    client = QdrantClient(
-        host=config.QDRANT_HOST,
-        port=config.QDRANT_PORT,
-        https=config.QDRANT_USE_HTTPS,
-        api_key=config.QDRANT_API_KEY,
-    )
-
-    try:
-        client.get_collection(collection_name)
-    except:
-        vector_size = 1536 if "openai" in collection_name else 768
-        client.recreate_collection(
-            collection_name=collection_name,
-            vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE)
-        )
+    client = get_qdrant_client()
+    get_vector_store("qdrant").ensure_collection(collection_name)
 
     return QdrantVectorStore(
         client=client,
@@ -90,173 +100,508 @@ def save_embedded_files(files):
         json.dump(sorted(list(files)), f)
 
 
+def load_chunk_manifest():
+    # {source: {"file_hash": sha256, "chunks": {point_id: collection}}}
+    if os.path.exists(CHUNK_MANIFEST_PATH):
+        try:
+            with open(CHUNK_MANIFEST_PATH, "r") as f:
+                content = f.read().strip()
+                return json.loads(content) if content else {}
+        except Exception as e:
+            print(f"[⚠️ MANIFEST LOAD ERROR] {e}")
+    return {}
 
-def create_embeddings(force=False, specific_file=None):
-    llm = ChatOpenAI(api_key=config.OPENAI_API_KEY, model=config.GPT_MODEL)
-    from qdrant_client.models import PointStruct
-    client = QdrantClient(
-        host=config.QDRANT_HOST,
-        port=config.QDRANT_PORT,
-        https=config.QDRANT_USE_HTTPS,
-        api_key=config.QDRANT_API_KEY,
-    )
+
+def save_chunk_manifest(manifest):
+    tmp_path = CHUNK_MANIFEST_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, CHUNK_MANIFEST_PATH)
+
+
+def _save_manifest_entry(manifest, local_name, entry):
+    """Persist one source's entry on top of the current file, not over a snapshot taken earlier.
+
+    A run holds its manifest for minutes; writing the whole snapshot back would
+    resurrect entries that delete_pdf() removed in the meantime.
+    """
+    with _manifest_lock:
+        latest = load_chunk_manifest()
+        latest[local_name] = entry
+        save_chunk_manifest(latest)
+        manifest[local_name] = entry
+
+
+def _record_embedded(added=(), removed=()):
+    """Update embedded_files.json in place; names deleted meanwhile or without chunks are not added."""
+    with _manifest_lock:
+        files = load_embedded_files()
+        if added:
+            manifest = load_chunk_manifest()
+            files.update(name for name in added if manifest.get(name, {}).get("chunks"))
+        files.difference_update(removed)
+        save_embedded_files(files)
+
+
+def make_point_id(source, page, text):
+    content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{source}|{page}|{content_hash}"))
+
+
+def _delete_points(store, chunks):
+    """Delete {point_id: collection} entries from their collections."""
+    by_collection = {}
+    for point_id, collection in chunks.items():
+        by_collection.setdefault(collection, []).append(point_id)
+    for collection, ids in by_collection.items():
+        sparse_index.get_index(collection).remove(ids)
+        store.delete_ids(collection, ids)
+
+
+def _delete_source_points(store, source):
+    """Remove every point of a source with one filtered delete per collection (served by the source payload index)."""
+    for collection in COLLECTIONS:
+        sparse_index.get_index(collection).remove_source(source)
+        try:
+            store.delete_by_filter(collection, {"source": source})
+        except Exception as e:
+            print(f"[⚠️ SOURCE DELETE ERROR] {collection}: {e}")
+    search_cache.bump_index_version(*COLLECTIONS)
+
+
+
+def get_collection_name(lang):
+    return "uae_law_arabert" if lang == "ar" else "uae_law_openai"
+
+
+def _collect_chunks(blob_name, source, splitter, content_hash=None):
+    """Extract, split and language-tag every usable chunk of a downloaded blob (a local path, or its bytes)."""
+    if blob_name.endswith(".pdf"):
+        label = "PDF"
+        with metrics.span("extraction", kind="pdf"):
+            pages = extract_text(source, content_hash=content_hash, strict=True)
+    else:
+        label = "HTML"
+        with metrics.span("extraction", kind="html"):
+            if isinstance(source, bytes):
+                html_pages = extract_text_from_html_string(source.decode("utf-8"), content_hash=content_hash, strict=True)
+            else:
+                html_pages = extract_text_from_html(source, content_hash=content_hash, strict=True)
+            pages = [(page_num, page_text) for page_num, page_text, _, _ in html_pages if page_text.strip()]
+    if not pages:
+        raise ExtractionError(f"no text extracted from {blob_name}")
+
+    records = []
+    split_seconds = detect_seconds = 0.0
+    for page_num, page_text in pages:
+        last_detected_lang = "en"
+        started = time.perf_counter()
+        chunks = splitter.split_text(page_text)
+        split_seconds += time.perf_counter() - started
+        for chunk in chunks:
+            chunk = chunk.replace('\n', ' ').strip()
+            if not chunk or len(chunk) < 20:
+                print(f"[SKIP] Empty or short chunk: Page {page_num}")
+                metrics.inc("chunks_skipped_total", reason="short")
+                continue
+            if not re.search(r'[a-zA-Z\u0600-\u06FF]', chunk):
+                print(f"[SKIP] No useful text: Page {page_num}")
+                metrics.inc("chunks_skipped_total", reason="no_text")
+                continue
+
+            started = time.perf_counter()
+            lang = detect_language(chunk)
+            detect_seconds += time.perf_counter() - started
+            if lang == "unknown":
+                lang = last_detected_lang
+            else:
+                last_detected_lang = lang
+            print(f"[LANG DETECTED IN {label}] {lang}: {chunk[:80]}")
+            records.append({"text": chunk, "page": page_num, "lang": lang})
+
+    # Per-chunk spans would dwarf the work itself, so these stages are recorded once per file
+    metrics.observe("split", split_seconds)
+    metrics.observe("language_detection", detect_seconds)
+    metrics.log_event("chunks_collected", source=os.path.basename(blob_name), pages=len(pages), chunks=len(records),
+                      split_ms=round(split_seconds * 1000, 2), language_detection_ms=round(detect_seconds * 1000, 2))
+    return records
+
+
+def _dedupe_records(records, local_name):
+    """Assign content-hash point IDs and drop chunks that repeat on the same page."""
+    unique = {}
+    for record in records:
+        record["id"] = make_point_id(local_name, record["page"], record["text"])
+        unique.setdefault(record["id"], record)
+    if len(unique) < len(records):
+        metrics.inc("chunks_skipped_total", len(records) - len(unique), reason="duplicate")
+    return list(unique.values())
+
+
+def _embed_batch(texts, lang, embeddings):
+    if lang == "ar":
+        # AraBERT runs on local CPU threads; serialize passes instead of oversubscribing cores
+        with _arabert_lock, metrics.span("embedding", model="arabert") as fields:
+            fields["texts"] = len(texts)
+            return get_arabic_embeddings(texts)
+    with metrics.span("embedding", model="openai") as fields:
+        fields["texts"] = len(texts)
+        return call_openai(embeddings.embed_documents, texts)
+
+
+def _upsert_points(store, collection, points, uploaded):
+    with metrics.span("upsert", collection=collection) as fields:
+        fields["points"] = len(points)
+        store.upsert(collection, points)
+    metrics.inc("chunks_embedded_total", len(points), collection=collection)
+    index = sparse_index.get_index(collection)
+    for point in points:
+        index.add(point.id, point.payload["text"], point.payload)
+    uploaded.update({point.id: collection for point in points})
+
+
+def _embed_and_upsert(store, embeddings, records, local_name, batch_size):
+    """Embed records in batches per collection, upserting each batch as soon as it is embedded."""
+    by_collection = {}
+    for record in records:
+        by_collection.setdefault(get_collection_name(record["lang"]), []).append(record)
+
+    uploaded = {}
+    for collection, items in by_collection.items():
+        points = []
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            try:
+                vectors = _embed_batch([r["text"] for r in batch], batch[0]["lang"], embeddings)
+            except Exception as e:
+                print(f"[EMBED ERROR] {collection} batch {start // batch_size}: {e}")
+                continue
+
+            for record, vector in zip(batch, vectors):
+                points.append(PointStruct(
+                    id=record["id"],
+                    vector=vector,
+                    payload={
+                        "text": record["text"],
+                        "source": local_name,
+                        "page": record["page"],
+                        "tags": record.get("tags", []),
+                        "tags_pending": record.get("tags_pending", False),
+                        "lang": record["lang"]
+                    }
+                ))
+
+            while len(points) >= config.UPSERT_BATCH_SIZE:
+                chunk, points = points[:config.UPSERT_BATCH_SIZE], points[config.UPSERT_BATCH_SIZE:]
+                _upsert_points(store, collection, chunk, uploaded)
+
+        if points:
+            _upsert_points(store, collection, points, uploaded)
+        print(f"[✅] Uploaded {sum(1 for c in uploaded.values() if c == collection)} chunk(s) to {collection}: {local_name}")
+    return uploaded
+
+
+def _ingest_blob(blob_name, force, embedded_files, manifest, clients, splitter, batch_size, tagging):
+    """Download, diff, tag, embed and upsert one blob. Returns the number of new chunks, or None if skipped."""
+    local_name = os.path.basename(blob_name)
+    temp_path = os.path.join(TEMP_DIR, local_name)
+
+    if not force and local_name in embedded_files:
+        print(f"[SKIP] Already embedded: {local_name}")
+        return None
+
+    with metrics.span("blob_download") as fields:
+        fields["blob"] = blob_name
+        download_file(blob_name, temp_path)
+    return _ingest_source(blob_name, temp_path, manifest, clients, splitter, batch_size, tagging)
+
+
+def _ingest_source(blob_name, source, manifest, clients, splitter, batch_size, tagging):
+    """Diff, tag, embed and upsert one document given as a local path or its bytes. Returns the number of new chunks, or None if extraction failed."""
+    llm, store, embeddings = clients
+    local_name = os.path.basename(blob_name)
+    file_hash = content_sha256(source)
+    with _manifest_lock:
+        entry = manifest.get(local_name)
+    if entry and entry.get("file_hash") == file_hash:
+        print(f"[SKIP] Unchanged since last embedding: {local_name}")
+        metrics.inc("files_skipped_total", reason="unchanged")
+        return 0
+    try:
+        records = _dedupe_records(_collect_chunks(blob_name, source, splitter, file_hash), local_name)
+    except ExtractionError as e:
+        # Deleting the old chunks now would leave the document unsearchable with nothing to retry;
+        # keep them, and leave the hash unset so the next run extracts again
+        kept = entry["chunks"] if entry else {}
+        print(f"[⚠️ EXTRACTION FAILED] {local_name}: {e}; keeping {len(kept)} indexed chunk(s), will retry")
+        metrics.inc("files_skipped_total", reason="extraction_failed")
+        _save_manifest_entry(manifest, local_name, {"file_hash": None, "chunks": kept})
+        return None
+    if entry is None:
+        _delete_source_points(store, local_name)
+        entry = {"chunks": {}}
+
+    current_ids = {record["id"] for record in records}
+    new_records = [record for record in records if record["id"] not in entry["chunks"]]
+    vanished = {pid: col for pid, col in entry["chunks"].items() if pid not in current_ids}
+
+    if tagging == "inline":
+        with metrics.span("tagging", mode="inline") as fields:
+            fields["chunks"] = len(new_records)
+            tags_per_record = tag_chunks(llm, [r["text"] for r in new_records])
+        for record, tags in zip(new_records, tags_per_record):
+            record["tags"] = tags
+    elif tagging == "deferred":
+        for record in new_records:
+            record["tags_pending"] = True
+    uploaded = _embed_and_upsert(store, embeddings, new_records, local_name, batch_size)
+
+    if vanished:
+        _delete_points(store, vanished)
+        print(f"[🗑️] Removed {len(vanished)} vanished chunk(s): {local_name}")
+
+    touched = set(uploaded.values()) | set(vanished.values())
+    if touched:
+        search_cache.bump_index_version(*sorted(touched))
+        answer_cache.invalidate_sources([local_name])
+
+    kept = {pid: col for pid, col in entry["chunks"].items() if pid in current_ids}
+    kept.update(uploaded)
+    # Only mark the file unchanged once every chunk made it into the index
+    _save_manifest_entry(manifest, local_name, {
+        "file_hash": file_hash if len(kept) == len(current_ids) else None,
+        "chunks": kept,
+    })
+    print(f"[♻️] {local_name}: {len(uploaded)} new, {len(kept) - len(uploaded)} unchanged, {len(vanished)} removed")
+    return len(uploaded)
+
+
+def create_embeddings(force=False, specific_file=None, batch_size=None, tagging=None, max_workers=None):
+    """tagging: "inline" tags before upsert, "deferred" leaves it to backfill_tags(), "off" skips it.
+
+    Files are ingested by a bounded thread pool so downloads, OpenAI calls and
+    Qdrant upserts of different files overlap; OpenAI and Qdrant calls share
+    the process-wide limits and 429-aware backoff in ratelimit.py.
+    """
+    batch_size = batch_size or config.EMBED_BATCH_SIZE
+    tagging = tagging or config.TAGGING_MODE
+    max_workers = max_workers or config.INGEST_MAX_WORKERS
     embedded_files = load_embedded_files()
+    manifest = load_chunk_manifest()
     processed_now = set()
-    all_blobs = list_files()
 
     if specific_file:
         target_blobs = [specific_file]
     else:
+        # List only the indexed folders server-side; a fresh listing picks up other processes' uploads
         target_blobs = [
-            f for f in all_blobs if f.endswith((".pdf", ".html"))
-            and not f.startswith("case-files/")
-            and (f.startswith("legal-files/") or f.startswith("crawled/pdfs/") or f.startswith("crawled/html/"))
+            f for prefix in INDEXED_PREFIXES for f in list_files(prefix, cached=False)
+            if f.endswith((".pdf", ".html"))
         ]
 
-    # Set up vectorstore (needed even if we embed per chunk)
-    embeddings = OpenAIEmbeddings(api_key=config.OPENAI_API_KEY, model=config.EMBEDDING_MODEL)
-
-    for blob_name in target_blobs:
-        local_name = os.path.basename(blob_name)
-        temp_path = os.path.join(TEMP_DIR, local_name)
-
-        if not force and local_name in embedded_files:
-            print(f"[SKIP] Already embedded: {local_name}")
-            continue
-
-        try:
-            download_file(blob_name, temp_path)
-            splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-
-            if blob_name.endswith(".pdf"):
-                pages = extract_text(temp_path)
-                for page_num, page_text in pages:
-                    chunks = splitter.split_text(page_text)
-                    for chunk in chunks:
-                        last_detected_lang = "en"
-                        chunk = chunk.replace('\n', ' ').strip()
-                        if not chunk or len(chunk) < 20:
-                            print(f"[SKIP] Empty or short chunk: Page {page_num}")
-                            continue
-                        if not re.search(r'[a-zA-Z\u0600-\u06FF]', chunk):
-                            print(f"[SKIP] No useful text: Page {page_num}")
-                            continue
-
-                        lang = detect_language(chunk)
-                        if lang == "unknown":
-                            lang = last_detected_lang
-                        else:
-                            last_detected_lang = lang
-                        print(f"[LANG DETECTED IN PDF] {lang}: {chunk[:80]}")
-
-                        try:
-                            tag_prompt = f"Assign 2-4 short relevant legal topic tags (comma-separated) for the following law excerpt:\n\n{chunk[:1000]}"
-                            tags_response = llm.invoke(tag_prompt).content
-                            tags = [t.strip() for t in tags_response.split(",")]
-                        except Exception as e:
-                            print(f"[TAG ERROR] {e}")
-                            tags = []
-
-                        # Embed based on language
-                        try:
-                            collection = "uae_law_arabert" if lang == "ar" else "uae_law_openai"
-                            embedding = get_arabic_embedding(chunk) if lang == "ar" else embeddings.embed_query(chunk)
-                        except Exception as e:
-                            print(f"[EMBED ERROR] {e}")
-                            continue
-
-                        
-
-                        client.upsert(
-                            collection_name=collection,
-                            points=[
-                                PointStruct(
-                                    id=str(uuid.uuid4()),
-                                    vector=embedding,
-                                    payload={
-                                        "text": chunk,
-                                        "source": local_name,
-                                        "page": page_num,
-                                        "tags": tags,
-                                        "lang": lang
-                                    }
-                                )
-                            ]
-                        )
-
-            elif blob_name.endswith(".html"):
-                html_data = extract_text_from_html(temp_path)
-                for page_num, page_text, title, source_url in html_data:
-                    chunks = splitter.split_text(page_text)
-                    for chunk in chunks:
-                        last_detected_lang = "en"
-                        chunk = chunk.replace('\n', ' ').strip()
-                        if not chunk or len(chunk) < 20:
-                            print(f"[SKIP] Empty or short chunk: Page {page_num}")
-                            continue
-                        if not re.search(r'[a-zA-Z\u0600-\u06FF]', chunk):
-                            print(f"[SKIP] No useful text: Page {page_num}")
-                            continue
-
-                        lang = detect_language(chunk)
-                        if lang == "unknown":
-                            lang = last_detected_lang
-                        else:
-                            last_detected_lang = lang
-                        print(f"[LANG DETECTED IN HTML] {lang}: {chunk[:80]}")
-
-                        try:
-                            tag_prompt = f"Assign 2-4 short relevant legal topic tags (comma-separated) for the following law excerpt:\n\n{chunk[:1000]}"
-                            tags_response = llm.invoke(tag_prompt).content
-                            tags = [t.strip() for t in tags_response.split(",")]
-                        except Exception as e:
-                            print(f"[TAG ERROR] {e}")
-                            tags = []
-
-                        try:
-                            collection = "uae_law_arabert" if lang == "ar" else "uae_law_openai"
-                            embedding = get_arabic_embedding(chunk) if lang == "ar" else embeddings.embed_query(chunk)
-                        except Exception as e:
-                            print(f"[EMBED ERROR] {e}")
-                            continue
-
-                        
-
-                        client.upsert(
-                            collection_name=collection,
-                            points=[
-                                PointStruct(
-                                    id=str(uuid.uuid4()),
-                                    vector=embedding,
-                                    payload={
-                                        "text": chunk,
-                                        "source": local_name,
-                                        "page": page_num,
-                                        "tags": tags,
-                                        "lang": lang
-                                    }
-                                )
-                            ]
-                        )
-            print(f"[✅] Uploaded chunk ({lang}) to Qdrant: {local_name} - Page {page_num}")
-            processed_now.add(local_name)
-
-        except Exception as e:
-            print(f"[ERROR] Failed to process {blob_name}: {e}")
-
+    store = get_vector_store()
+    for collection in COLLECTIONS:
+        store.ensure_collection(collection)
+    shared_clients = (get_llm(), store, get_embeddings())
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    total_chunks = 0
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(target_blobs) or 1))) as pool:
+        futures = {
+            pool.submit(_ingest_blob, blob_name, force, embedded_files, manifest,
+                        shared_clients, splitter, batch_size, tagging): blob_name
+            for blob_name in target_blobs
+        }
+        for future in as_completed(futures):
+            blob_name = futures[future]
+            try:
+                new_chunks = future.result()
+            except Exception as e:
+                print(f"[ERROR] Failed to process {blob_name}: {e}")
+                continue
+            if new_chunks is not None:
+                total_chunks += new_chunks
+                processed_now.add(os.path.basename(blob_name))
+
+    elapsed = time.perf_counter() - started
     if processed_now:
-        print(f"[✅] Embedded documents from {len(processed_now)} new file(s).")
+        rate = total_chunks / elapsed if elapsed > 0 else 0.0
+        print(f"[✅] Embedded {total_chunks} chunk(s) from {len(processed_now)} file(s) in {elapsed:.1f}s ({rate:.1f} chunks/sec).")
     else:
         print("[⚠️] No new documents embedded.")
 
-    embedded_files.update(processed_now)
-    save_embedded_files(embedded_files)
-    
+    store.flush()
+    sparse_index.save_all()
+    _record_embedded(added=processed_now)
+
+
+
+class StreamingIngestor:
+    """Index documents as they arrive (e.g. from the crawler) instead of downloading them back from Blob.
+
+    submit() queues a document's bytes on a thread pool that extracts, embeds
+    and upserts it right away, so it is searchable while the crawl is still
+    running. At most two documents per worker wait in the queue; submit()
+    blocks beyond that so a fast crawl can't pile up bytes in memory. close() waits for the queue to drain, then persists the sparse
+    index and the embedded-file records once.
+    """
+
+    def __init__(self, batch_size=None, tagging=None, max_workers=None):
+        self.batch_size = batch_size or config.EMBED_BATCH_SIZE
+        self.tagging = tagging or config.TAGGING_MODE
+        self.manifest = load_chunk_manifest()
+        store = get_vector_store()
+        for collection in COLLECTIONS:
+            store.ensure_collection(collection)
+        self.clients = (get_llm(), store, get_embeddings())
+        self.splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+        max_workers = max_workers or config.INGEST_MAX_WORKERS
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stream-ingest")
+        self.slots = threading.BoundedSemaphore(2 * max_workers)
+        self.futures = []
+        self.indexed = set()
+
+    def submit(self, blob_name, data):
+        """Queue blob_name (its future name in the container) for indexing from data, its bytes.
+
+        Blocks while the queue is full; call it from a worker thread, not the event loop.
+        """
+        self.slots.acquire()
+        try:
+            future = self.pool.submit(self._ingest, blob_name, data)
+        except Exception:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        self.futures.append(future)
+        return future
+
+    def _ingest(self, blob_name, data):
+        with metrics.span("stream_ingest") as fields:
+            fields["blob"] = blob_name
+            new_chunks = _ingest_source(blob_name, data, self.manifest, self.clients, self.splitter,
+                                        self.batch_size, self.tagging)
+        if new_chunks is None:
+            return 0
+        with _manifest_lock:
+            self.indexed.add(os.path.basename(blob_name))
+        return new_chunks
+
+    def close(self):
+        total_chunks = 0
+        for future in as_completed(self.futures):
+            try:
+                total_chunks += future.result()
+            except Exception as e:
+                print(f"[ERROR] Streaming ingestion failed: {e}")
+        self.pool.shutdown(wait=True)
+        self.clients[1].flush()
+        sparse_index.save_all()
+        # Later create_embeddings() runs skip the archived copies of these documents
+        _record_embedded(added=self.indexed)
+        print(f"[✅] Indexed {total_chunks} new chunk(s) from {len(self.indexed)} streamed document(s).")
+        return total_chunks
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def backfill_tags(batch_size=None, limit=None):
+    """Tag points upserted with tagging="deferred"; vectors are searchable meanwhile.
+
+    Only one back-fill runs per process: a call made while one is running asks
+    it for another pass (to pick up the newly pending points) and returns 0.
+    """
+    _backfill_requested.set()
+    if not _backfill_lock.acquire(blocking=False):
+        print("[🏷️] Tag back-fill already running; it will pick up the new chunks")
+        return 0
+    try:
+        tagged = 0
+        while _backfill_requested.is_set() and (limit is None or tagged < limit):
+            _backfill_requested.clear()
+            tagged += _backfill_pass(batch_size or config.TAG_BATCH_SIZE, None if limit is None else limit - tagged)
+        # Persist once at the end: a local-store save() per batch rewrote the whole collection
+        get_vector_store().flush()
+    finally:
+        _backfill_lock.release()
+    print(f"[✅] Tag back-fill finished: {tagged} chunk(s) tagged.")
+    return tagged
+
+
+def _backfill_pass(batch_size, limit):
+    llm = get_llm()
+    store = get_vector_store()
+    tagged = 0
+
+    for collection in COLLECTIONS:
+        offset = None
+        while limit is None or tagged < limit:
+            # Page forward: chunks whose tagging failed stay pending for the next back-fill
+            points, offset = store.scroll(
+                collection,
+                filters={"tags_pending": True},
+                limit=batch_size,
+                offset=offset,
+                with_payload=["text"],
+            )
+            if not points:
+                break
+
+            with metrics.span("tagging", mode="backfill"):
+                tags = tag_chunks(llm, [p.payload.get("text", "") for p in points], batch_size=batch_size)
+            updates = [
+                (point.id, {"tags": point_tags, "tags_pending": False})
+                for point, point_tags in zip(points, tags) if point_tags
+            ]
+            if not updates:
+                print(f"[⚠️ TAG BACKFILL] No tags returned for {len(points)} chunk(s) in {collection}; stopping")
+                return tagged
+            store.set_payload(collection, updates)
+            tagged += len(updates)
+            search_cache.bump_index_version(collection)
+            print(f"[🏷️] Back-filled tags for {len(updates)}/{len(points)} chunk(s) in {collection}")
+            if offset is None:
+                break
+    return tagged
+
+
+def rebuild_sparse_index(batch_size=1000, collections=COLLECTIONS):
+    """Rebuild the local BM25 indexes from every point already in the vector store.
+
+    Needed once for collections indexed before hybrid search existed:
+    `python utils.py rebuild-sparse-index`, the Admin tab button, or let the
+    first hybrid search of an empty index start it in the background.
+    """
+    store = get_vector_store()
+    for collection in collections:
+        index = sparse_index.get_index(collection)
+        index.remove(list(index.docs))
+        offset, total = None, 0
+        while True:
+            points, offset = store.scroll(
+                collection,
+                limit=batch_size,
+                offset=offset,
+                with_payload=list(sparse_index.PAYLOAD_KEYS),
+            )
+            for point in points:
+                index.add(str(point.id), point.payload.get("text", ""), point.payload)
+            total += len(points)
+            if offset is None:
+                break
+        index.save()
+        search_cache.bump_index_version(collection)
+        print(f"[✅] Sparse index for {collection} rebuilt with {total} chunk(s)")
 
 
 def load_vectorstore(lang="en", k=10):
-    collection_name = "uae_law_arabert" if lang == "ar" else "uae_law_openai"
-    embeddings = OpenAIEmbeddings(api_key=config.OPENAI_API_KEY, model=config.EMBEDDING_MODEL)
+    collection_name = get_collection_name(lang)
+    embeddings = get_embeddings()
     return get_qdrant_vectorstore(embeddings, collection_name).as_retriever(
         search_type="similarity",
         search_kwargs={"k": k}
@@ -265,6 +610,24 @@ def load_vectorstore(lang="en", k=10):
 
 def delete_pdf(blob_filename):
     delete_file(blob_filename)
+
+    local_name = os.path.basename(blob_filename)
+    store = get_vector_store()
+    for collection in COLLECTIONS:
+        store.ensure_collection(collection)
+    # One filtered delete per collection also catches points the manifest never knew about
+    _delete_source_points(store, local_name)
+    store.flush()
+    print(f"[🗑️] Removed all chunks of {local_name} from the {store.name} vector store")
+
+    with _manifest_lock:
+        manifest = load_chunk_manifest()
+        manifest.pop(local_name, None)
+        save_chunk_manifest(manifest)
+    sparse_index.save_all()
+    answer_cache.invalidate_sources([local_name])
+
+    _record_embedded(removed=[local_name])
     return True
 
 def upload_pdf(file_obj, filename, is_case=False):
@@ -316,37 +679,194 @@ def extract_text_from_scanned_pdf(file_path: str, lang: str = "eng") -> str:
 def is_arabic(text: str) -> bool:
     return detect_language(text) == "ar"
 
-def direct_qdrant_search(query, lang="en", k=10):
-    client = QdrantClient(
-        host=config.QDRANT_HOST,
-        port=config.QDRANT_PORT,
-        https=config.QDRANT_USE_HTTPS,
-        api_key=config.QDRANT_API_KEY,
-    )
+def embed_query(query, lang="en"):
+    embedding = search_cache.get_embedding(query, lang)
+    if embedding is None:
+        with metrics.span("embed_query", model="arabert" if lang == "ar" else "openai"):
+            embedding = get_arabic_embedding(query) if lang == "ar" else get_embeddings().embed_query(query)
+        search_cache.put_embedding(query, lang, embedding)
+    return embedding
 
-    collection_name = "uae_law_arabert" if lang == "ar" else "uae_law_openai"
-    
-    if lang == "ar":
-        embedding = get_arabic_embedding(query)
-    else:
-        embedding_model = OpenAIEmbeddings(api_key=config.OPENAI_API_KEY, model=config.EMBEDDING_MODEL)
-        embedding = embedding_model.embed_query(query)
 
-    print(f"[DEBUG] Searching in collection: {collection_name} | Query lang: {lang}")
+def _scored_dense_search(query, lang, collection_name, k, filters=None):
+    embedding = embed_query(query, lang)
+    store = get_vector_store()
+    print(f"[DEBUG] Searching in collection: {collection_name} | Query lang: {lang} | Backend: {store.name}")
+    try:
+        with metrics.span("dense_search", backend=store.name, collection=collection_name):
+            return store.search(collection_name, embedding, k, filters)
+    except Exception as e:
+        local = get_vector_store("local")
+        if store is local or not config.VECTOR_FALLBACK_LOCAL or not local.exists():
+            raise
+        print(f"[⚠️ VECTOR SEARCH FALLBACK] {store.name} failed ({e}); using the local snapshot")
+        metrics.inc("search_fallbacks_total", backend=store.name)
+        with metrics.span("dense_search", backend=local.name, collection=collection_name):
+            return local.search(collection_name, embedding, k, filters)
+
+
+def _dense_search(query, lang, collection_name, k, filters=None):
+    return [payload for payload, _ in _scored_dense_search(query, lang, collection_name, k, filters)]
+
+
+def _ensure_sparse_index(collection):
+    """Start a background rebuild, once per process, of an empty BM25 index whose collection has points."""
+    with _sparse_checked_lock:
+        if collection in _sparse_checked:
+            return
+        _sparse_checked.add(collection)
+    if sparse_index.get_index(collection).docs:
+        return
+    try:
+        count = get_vector_store().count(collection)
+    except Exception as e:
+        print(f"[⚠️ SPARSE INDEX CHECK ERROR] {collection}: {e}")
+        return
+    if count:
+        print(f"[🔤 SPARSE INDEX] {collection} has {count} point(s) but no BM25 index; rebuilding in the background")
+        threading.Thread(target=rebuild_sparse_index, kwargs={"collections": [collection]}, daemon=True).start()
+
+
+def _scored_sparse_search(query, collection_name, k, filters=None):
+    _ensure_sparse_index(collection_name)
+    accept = (lambda payload: matches_filters(payload, filters)) if filters else None
+    with metrics.span("sparse_search", collection=collection_name):
+        return [(payload, score) for _, score, payload in sparse_index.get_index(collection_name).search(query, k, accept)]
+
+
+def _sparse_search(query, collection_name, k, filters=None):
+    return [payload for payload, _ in _scored_sparse_search(query, collection_name, k, filters)]
+
+
+def _to_documents(payloads):
+    return [Document(page_content=payload['text'], metadata=payload) for payload in payloads]
 
-    search_results = client.search(
-        collection_name=collection_name,
-        query_vector=embedding,
-        limit=k,
-        with_payload=True
-    )
 
-    docs = []
-    for result in search_results:
-        docs.append(Document(
-            page_content=result.payload['text'],
-            metadata=result.payload
-        ))
+def _search_options(hybrid, filters):
+    hybrid = config.HYBRID_SEARCH if hybrid is None else hybrid
+    filters = {key: value for key, value in (filters or {}).items() if value not in (None, "", [])}
+    # The sparse index does not carry tags, so tag-filtered searches stay dense-only
+    if "tags" in filters:
+        hybrid = False
+    return hybrid, filters
 
+
+def _filters_variant(variant, filters):
+    if filters:
+        variant += ":" + json.dumps(filters, sort_keys=True, ensure_ascii=False, default=list)
+    return variant
+
+
+CROSS_LINGUAL_LANGS = dict(zip(COLLECTIONS, ("en", "ar")))
+
+
+def cross_lingual_search(query, k=10, hybrid=None, filters=None):
+    """Search both collections in parallel, each with its own embedding model, and merge by normalized score.
+
+    Per collection the scores (cosine, or RRF of dense + BM25 when hybrid) are min-max
+    normalized and weighted by config.CROSS_LINGUAL_WEIGHTS; a chunk found in both
+    collections keeps its best score.
+    """
+    hybrid, filters = _search_options(hybrid, filters)
+    versions = [search_cache.get_index_version(collection) for collection in CROSS_LINGUAL_LANGS]
+    version = ".".join(str(v) for v in versions)
+    variant = _filters_variant("cross-hybrid" if hybrid else "cross-dense", filters)
+
+    payloads = search_cache.get_results(query, "*", k, version, variant)
+    if payloads is not None:
+        print(f"[CACHE HIT] cross-lingual v{version} | hit rate {search_cache.stats()['hit_rate']:.0%}")
+        return _to_documents(payloads)
+
+    # Both query embeddings and both dense searches run concurrently; BM25 is local and runs meanwhile
+    dense_futures = {
+        collection: _search_pool.submit(_scored_dense_search, query, lang, collection, k, filters)
+        for collection, lang in CROSS_LINGUAL_LANGS.items()
+    }
+    sparse_results = {
+        collection: _scored_sparse_search(query, collection, k, filters) if hybrid else []
+        for collection in CROSS_LINGUAL_LANGS
+    }
+
+    best = {}
+    for collection, future in dense_futures.items():
+        try:
+            dense = future.result()
+        except Exception as e:
+            print(f"[⚠️ CROSS-LINGUAL SEARCH ERROR] {collection}: {e}")
+            dense = []
+        dense_docs = _to_documents([payload for payload, _ in dense])
+        if hybrid:
+            sparse_docs = _to_documents([payload for payload, _ in sparse_results[collection]])
+            scored = reciprocal_rank_fusion(
+                [dense_docs, sparse_docs],
+                k=k,
+                weights=[1.0, config.HYBRID_SPARSE_WEIGHT],
+                with_scores=True,
+            )
+        else:
+            scored = list(zip(dense_docs, [score for _, score in dense]))
+
+        weight = config.CROSS_LINGUAL_WEIGHTS.get(collection, 1.0)
+        for doc, score in min_max_normalize(scored):
+            key = doc_key(doc)
+            if key not in best or weight * score > best[key][1]:
+                best[key] = (doc, weight * score)
+        print(f"[CROSS-LINGUAL] {collection}: {len(scored)} hit(s)")
+
+    merged = sorted(best.values(), key=lambda item: item[1], reverse=True)[:k]
+    payloads = [doc.metadata for doc, _ in merged]
+    search_cache.put_results(query, "*", k, version, payloads, variant)
+    return _to_documents(payloads)
+
+
+def direct_qdrant_search(query, lang="en", k=10, hybrid=None, filters=None, cross_lingual=None):
+    """Dense search, fused with BM25 over the local sparse index when hybrid (config.HYBRID_SEARCH).
+
+    filters restricts results by payload, e.g. {"source": ["a.pdf", "b.pdf"], "page": {"gte": 3}}.
+    With cross_lingual (config.CROSS_LINGUAL_SEARCH) both collections are searched, whatever lang is.
+    """
+    cross_lingual = config.CROSS_LINGUAL_SEARCH if cross_lingual is None else cross_lingual
+    with metrics.span("search", mode="cross_lingual" if cross_lingual else lang) as fields:
+        if cross_lingual:
+            docs = cross_lingual_search(query, k=k, hybrid=hybrid, filters=filters)
+        else:
+            docs = _collection_search(query, lang, k, hybrid, filters)
+        fields["results"] = len(docs)
     return docs
 
+
+def _collection_search(query, lang, k, hybrid, filters):
+    hybrid, filters = _search_options(hybrid, filters)
+    collection_name = get_collection_name(lang)
+    version = search_cache.get_index_version(collection_name)
+    variant = _filters_variant("hybrid" if hybrid else "dense", filters)
+
+    payloads = search_cache.get_results(query, lang, k, version, variant)
+    if payloads is not None:
+        print(f"[CACHE HIT] {collection_name} v{version} | hit rate {search_cache.stats()['hit_rate']:.0%}")
+    elif hybrid:
+        # Lexical search runs locally while the dense search waits on the network
+        dense_future = _search_pool.submit(_dense_search, query, lang, collection_name, k, filters)
+        sparse_payloads = _sparse_search(query, collection_name, k, filters)
+        dense_payloads = dense_future.result()
+        fused = reciprocal_rank_fusion(
+            [_to_documents(dense_payloads), _to_documents(sparse_payloads)],
+            k=k,
+            weights=[1.0, config.HYBRID_SPARSE_WEIGHT],
+        )
+        payloads = [doc.metadata for doc in fused]
+        print(f"[HYBRID] {len(dense_payloads)} dense + {len(sparse_payloads)} sparse -> {len(payloads)} fused")
+        search_cache.put_results(query, lang, k, version, payloads, variant)
+    else:
+        payloads = _dense_search(query, lang, collection_name, k, filters)
+        search_cache.put_results(query, lang, k, version, payloads, variant)
+
+    return _to_documents(payloads)
+
+
+if __name__ == "__main__":
+    # python utils.py rebuild-sparse-index -> one-time BM25 build for collections indexed before hybrid search
+    if sys.argv[1:] == ["rebuild-sparse-index"]:
+        rebuild_sparse_index()
+    else:
+        print("Usage: python utils.py rebuild-sparse-index")
@@ -0,0 +1,435 @@
+import os
+import sys
+import gzip
+import json
+import bisect
+import threading
+from collections import namedtuple
+import numpy as np
+from qdrant_client.models import (
+    Distance, VectorParams, PointStruct, PointIdsList, FilterSelector, Filter,
+    FieldCondition, MatchValue, MatchAny, Range, PayloadSchemaType,
+    SetPayload, SetPayloadOperation
+)
+import config
+from clients import get_qdrant_client
+from ratelimit import call_qdrant
+
+
+# Pluggable vector storage behind ingestion and search. Both backends speak the
+# same small interface with plain-dict filters (see build_filter):
+#   ensure_collection, upsert, delete_ids, delete_by_filter, search, scroll,
+#   set_payload, count, flush
+# "qdrant" talks to the hosted cluster; "local" keeps a cosine-normalized float32
+# matrix per collection (memory-mapped .npy) with a gzip JSON payload sidecar,
+# for offline runs, small corpora and as a fallback when the cluster is slow.
+
+COLLECTIONS = ("uae_law_openai", "uae_law_arabert")
+
+Record = namedtuple("Record", "id payload vector")
+
+
+def vector_size(collection):
+    return 1536 if "openai" in collection else 768
+
+
+def _clean(filters):
+    return {field: value for field, value in (filters or {}).items() if value not in (None, "", [])}
+
+
+def build_filter(filters):
+    """Translate {"source": ..., "lang": ..., "tags": ..., "page": ...} into a Qdrant Filter.
+
+    Values may be a single value, a list (match any) or, for page, {"gte": .., "lte": ..}.
+    """
+    conditions = []
+    for field, value in _clean(filters).items():
+        if isinstance(value, dict):
+            conditions.append(FieldCondition(key=field, range=Range(**value)))
+        elif isinstance(value, (list, tuple, set)):
+            conditions.append(FieldCondition(key=field, match=MatchAny(any=list(value))))
+        else:
+            conditions.append(FieldCondition(key=field, match=MatchValue(value=value)))
+    return Filter(must=conditions) if conditions else None
+
+
+def matches_filters(payload, filters):
+    """Same semantics as build_filter, evaluated locally against a payload dict."""
+    for field, value in _clean(filters).items():
+        actual = payload.get(field)
+        actual_values = actual if isinstance(actual, list) else [actual]
+        if isinstance(value, dict):
+            if actual is None or ("gte" in value and actual < value["gte"]) or ("lte" in value and actual > value["lte"]) \
+                    or ("gt" in value and actual <= value["gt"]) or ("lt" in value and actual >= value["lt"]):
+                return False
+        elif isinstance(value, (list, tuple, set)):
+            if not set(actual_values) & set(value):
+                return False
+        elif value not in actual_values:
+            return False
+    return True
+
+
+# === Qdrant ===
+
+class QdrantBackend:
+    name = "qdrant"
+
+    PAYLOAD_INDEXES = {
+        "source": PayloadSchemaType.KEYWORD,
+        "lang": PayloadSchemaType.KEYWORD,
+        "tags": PayloadSchemaType.KEYWORD,
+        "page": PayloadSchemaType.INTEGER,
+        "tags_pending": PayloadSchemaType.BOOL,
+    }
+
+    def __init__(self):
+        self._ensured = set()
+
+    @property
+    def client(self):
+        # Resolved per call so the registry's health check can swap in a fresh client
+        return get_qdrant_client()
+
+    def ensure_collection(self, collection):
+        """Create the collection if missing and make sure its payload indexes exist (once per process)."""
+        if collection in self._ensured:
+            return
+        client = self.client
+        # Only a collection that is really missing is created; a timeout or auth
+        # error propagates instead of being mistaken for "missing" and wiping data
+        if not call_qdrant(client.collection_exists, collection_name=collection):
+            call_qdrant(
+                client.create_collection,
+                collection_name=collection,
+                vectors_config=VectorParams(size=vector_size(collection), distance=Distance.COSINE)
+            )
+            print(f"[✅] Created collection {collection}")
+        info = call_qdrant(client.get_collection, collection_name=collection)
+
+        existing = set((info.payload_schema or {}).keys())
+        for field, schema in self.PAYLOAD_INDEXES.items():
+            if field not in existing:
+                client.create_payload_index(collection_name=collection, field_name=field, field_schema=schema)
+                print(f"[✅] Created {schema.value} payload index on {collection}.{field}")
+        self._ensured.add(collection)
+
+    def upsert(self, collection, points):
+        call_qdrant(self.client.upsert, collection_name=collection, points=points)
+
+    def delete_ids(self, collection, ids):
+        for start in range(0, len(ids), config.UPSERT_BATCH_SIZE):
+            call_qdrant(
+                self.client.delete,
+                collection_name=collection,
+                points_selector=PointIdsList(points=ids[start:start + config.UPSERT_BATCH_SIZE])
+            )
+
+    def delete_by_filter(self, collection, filters):
+        call_qdrant(
+            self.client.delete,
+            collection_name=collection,
+            points_selector=FilterSelector(filter=build_filter(filters) or Filter())
+        )
+
+    def search(self, collection, vector, k, filters=None):
+        """Return up to k (payload, score) pairs, best first."""
+        # Interactive path: no ingestion semaphore or retries, the client timeout bounds it
+        results = self.client.search(
+            collection_name=collection,
+            query_vector=vector,
+            query_filter=build_filter(filters),
+            limit=k,
+            with_payload=True
+        )
+        return [(result.payload, result.score) for result in results]
+
+    def scroll(self, collection, filters=None, limit=100, offset=None, with_payload=True, with_vectors=False):
+        """Return (records, next_offset); next_offset is None after the last page."""
+        return call_qdrant(
+            self.client.scroll,
+            collection_name=collection,
+            scroll_filter=build_filter(filters),
+            limit=limit,
+            offset=offset,
+            with_payload=with_payload,
+            with_vectors=with_vectors,
+        )
+
+    def set_payload(self, collection, updates):
+        """Merge payload fields into points; updates is a list of (point_id, payload) pairs."""
+        call_qdrant(
+            self.client.batch_update_points,
+            collection_name=collection,
+            update_operations=[
+                SetPayloadOperation(set_payload=SetPayload(payload=payload, points=[point_id]))
+                for point_id, payload in updates
+            ]
+        )
+
+    def count(self, collection):
+        return self.client.count(collection_name=collection, exact=True).count
+
+    def flush(self):
+        pass
+
+
+# === Local (memory-mapped NumPy) ===
+
+class _LocalCollection:
+    def __init__(self, directory, dim):
+        self.directory = directory
+        self.dim = dim
+        self.vectors_path = os.path.join(directory, "vectors.npy")
+        self.payloads_path = os.path.join(directory, "payloads.json.gz")
+        self.mtime = None
+        self.dirty = False
+        self._lock = threading.RLock()
+        self.load()
+
+    def load(self):
+        with self._lock:
+            self.ids, self.payloads, self.rows = [], [], {}
+            self.vectors = np.zeros((0, self.dim), dtype=np.float32)
+            self.alive = np.zeros(0, dtype=bool)
+            self.pending = []
+            self.order = None
+            if os.path.exists(self.payloads_path) and os.path.exists(self.vectors_path):
+                try:
+                    with gzip.open(self.payloads_path, "rt", encoding="utf-8") as f:
+                        sidecar = json.load(f)
+                    self.vectors = np.load(self.vectors_path, mmap_mode="r")
+                    self.ids, self.payloads = sidecar["ids"], sidecar["payloads"]
+                    self.rows = {point_id: row for row, point_id in enumerate(self.ids)}
+                    self.alive = np.ones(len(self.ids), dtype=bool)
+                    self.mtime = os.path.getmtime(self.payloads_path)
+                except Exception as e:
+                    print(f"[⚠️ LOCAL VECTORS LOAD ERROR] {self.directory}: {e}")
+            self.dirty = False
+
+    def reload_if_changed(self):
+        with self._lock:
+            if self.dirty or not os.path.exists(self.payloads_path):
+                return
+            if os.path.getmtime(self.payloads_path) != self.mtime:
+                self.load()
+
+    def _matrix(self):
+        if self.pending:
+            self.vectors = np.vstack([np.asarray(self.vectors)] + self.pending)
+            self.pending = []
+        return self.vectors
+
+    def upsert(self, points):
+        vectors = np.asarray([point.vector for point in points], dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.maximum(norms, 1e-12)
+        with self._lock:
+            self.delete_ids([str(point.id) for point in points])
+            start = len(self.ids)
+            for offset, point in enumerate(points):
+                self.rows[str(point.id)] = start + offset
+                self.ids.append(str(point.id))
+                self.payloads.append(dict(point.payload or {}))
+            self.pending.append(vectors)
+            self.alive = np.concatenate([self.alive, np.ones(len(points), dtype=bool)])
+            self.order = None
+            self.dirty = True
+
+    def delete_ids(self, ids):
+        with self._lock:
+            for point_id in ids:
+                row = self.rows.pop(str(point_id), None)
+                if row is not None:
+                    self.alive[row] = False
+                    self.order = None
+                    self.dirty = True
+
+    def delete_by_filter(self, filters):
+        with self._lock:
+            self.delete_ids([point_id for point_id, row in list(self.rows.items())
+                             if matches_filters(self.payloads[row], filters)])
+
+    def search(self, vector, k, filters=None):
+        query = np.asarray(vector, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        with self._lock:
+            matrix = self._matrix()
+            if not len(matrix):
+                return []
+            mask = self.alive.copy()
+            if _clean(filters):
+                for row in np.flatnonzero(mask):
+                    mask[row] = matches_filters(self.payloads[row], filters)
+            candidates = np.flatnonzero(mask)
+            if not len(candidates):
+                return []
+            scores = matrix[candidates] @ query if len(candidates) < len(matrix) else matrix @ query
+            top = np.argsort(-scores)[:k] if len(scores) <= k else np.argpartition(-scores, k)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self.payloads[candidates[i]], float(scores[i])) for i in top]
+
+    def scroll(self, filters=None, limit=100, offset=None, with_payload=True, with_vectors=False):
+        # Like Qdrant, pages run in point-id order and the offset is the id the
+        # next page starts at, so a save() compacting rows between pages is harmless
+        with self._lock:
+            matrix = self._matrix()
+            if self.order is None:
+                self.order = sorted(self.rows)
+            records = []
+            position = bisect.bisect_left(self.order, str(offset)) if offset is not None else 0
+            while position < len(self.order) and len(records) < limit:
+                point_id = self.order[position]
+                row = self.rows[point_id]
+                payload = self.payloads[row]
+                if matches_filters(payload, filters):
+                    if isinstance(with_payload, (list, tuple)):
+                        payload = {key: payload[key] for key in with_payload if key in payload}
+                    records.append(Record(
+                        id=point_id,
+                        payload=payload if with_payload else None,
+                        vector=matrix[row].tolist() if with_vectors else None,
+                    ))
+                position += 1
+            return records, (self.order[position] if position < len(self.order) else None)
+
+    def set_payload(self, updates):
+        with self._lock:
+            for point_id, payload in updates:
+                row = self.rows.get(str(point_id))
+                if row is not None:
+                    self.payloads[row].update(payload)
+                    self.dirty = True
+
+    def count(self):
+        with self._lock:
+            return len(self.rows)
+
+    def save(self):
+        with self._lock:
+            if not self.dirty:
+                return
+            matrix = self._matrix()
+            keep = np.flatnonzero(self.alive)
+            vectors = np.ascontiguousarray(matrix[keep], dtype=np.float32)
+            ids = [self.ids[row] for row in keep]
+            payloads = [self.payloads[row] for row in keep]
+
+            os.makedirs(self.directory, exist_ok=True)
+            # np.save appends .npy to names that lack it, so the temp name keeps the suffix
+            tmp_vectors = self.vectors_path[:-4] + ".tmp.npy"
+            tmp_payloads = self.payloads_path + ".tmp"
+            np.save(tmp_vectors, vectors)
+            with gzip.open(tmp_payloads, "wt", encoding="utf-8") as f:
+                json.dump({"dim": self.dim, "ids": ids, "payloads": payloads}, f, ensure_ascii=False)
+            os.replace(tmp_vectors, self.vectors_path)
+            os.replace(tmp_payloads, self.payloads_path)
+            self.load()
+
+
+class LocalBackend:
+    name = "local"
+
+    def __init__(self, directory=None):
+        self.directory = directory or config.LOCAL_VECTOR_DIR
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def _get(self, collection):
+        with self._lock:
+            store = self._collections.get(collection)
+            if store is None:
+                store = _LocalCollection(os.path.join(self.directory, collection), vector_size(collection))
+                self._collections[collection] = store
+        store.reload_if_changed()
+        return store
+
+    def ensure_collection(self, collection):
+        self._get(collection)
+
+    def upsert(self, collection, points):
+        self._get(collection).upsert(points)
+
+    def delete_ids(self, collection, ids):
+        self._get(collection).delete_ids(ids)
+
+    def delete_by_filter(self, collection, filters):
+        self._get(collection).delete_by_filter(filters)
+
+    def search(self, collection, vector, k, filters=None):
+        return self._get(collection).search(vector, k, filters)
+
+    def scroll(self, collection, filters=None, limit=100, offset=None, with_payload=True, with_vectors=False):
+        return self._get(collection).scroll(filters, limit, offset, with_payload, with_vectors)
+
+    def set_payload(self, collection, updates):
+        self._get(collection).set_payload(updates)
+
+    def count(self, collection):
+        return self._get(collection).count()
+
+    def exists(self):
+        return any(
+            os.path.exists(os.path.join(self.directory, collection, "vectors.npy"))
+            for collection in COLLECTIONS
+        )
+
+    def flush(self):
+        with self._lock:
+            stores = list(self._collections.values())
+        for store in stores:
+            store.save()
+
+
+# === Registry ===
+
+_backends = {}
+_registry_lock = threading.Lock()
+BACKENDS = {"qdrant": QdrantBackend, "local": LocalBackend}
+
+
+def get_vector_store(name=None):
+    """Shared backend instance; config.VECTOR_BACKEND picks the default ("qdrant" or "local")."""
+    name = name or config.VECTOR_BACKEND
+    with _registry_lock:
+        backend = _backends.get(name)
+        if backend is None:
+            if name not in BACKENDS:
+                raise ValueError(f"Unknown vector backend: {name}")
+            backend = BACKENDS[name]()
+            _backends[name] = backend
+        return backend
+
+
+def export_snapshot(source=None, target=None, batch_size=256):
+    """Copy every point (vectors and payloads) of both collections from source into target.
+
+    Defaults to exporting the Qdrant cluster into the local backend.
+    """
+    source = source or get_vector_store("qdrant")
+    target = target or get_vector_store("local")
+    for collection in COLLECTIONS:
+        target.ensure_collection(collection)
+        # The snapshot replaces whatever the target held
+        target.delete_by_filter(collection, {})
+        offset, total = None, 0
+        while True:
+            records, offset = source.scroll(collection, limit=batch_size, offset=offset, with_vectors=True)
+            if records:
+                target.upsert(collection, [
+                    PointStruct(id=record.id, vector=record.vector, payload=record.payload or {})
+                    for record in records
+                ])
+            total += len(records)
+            if offset is None:
+                break
+        print(f"[📦] Exported {total} point(s) of {collection} from {source.name} to {target.name}")
+    target.flush()
+
+
+if __name__ == "__main__":
+    # python vector_store.py export  -> snapshot the Qdrant cluster into config.LOCAL_VECTOR_DIR
+    if sys.argv[1:] == ["export"]:
+        export_snapshot()
+    else:
+        print("Usage: python vector_store.py export")